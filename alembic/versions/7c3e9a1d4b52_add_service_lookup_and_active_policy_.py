@@ -0,0 +1,71 @@
+"""add service lookup and active policy indexes
+
+Revision ID: 7c3e9a1d4b52
+Revises: 2605e91f94ff
+Create Date: 2026-10-15 10:02:41.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3e9a1d4b52"
+down_revision: Union[str, Sequence[str], None] = "2605e91f94ff"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Tables whose service_id must follow a duplicate service onto the row that is kept
+_SERVICE_CHILD_TABLES = ("policies", "patterns", "analysis_runs")
+
+
+def _merge_duplicate_services() -> None:
+    """
+    Fold services sharing (team_id, name) into the lowest id.
+
+    Services used to be created with a check-then-insert, so concurrent
+    uploads could leave duplicates that would block the unique index.
+    """
+    for table in _SERVICE_CHILD_TABLES:
+        op.execute(
+            sa.text(
+                f"""
+                UPDATE {table} SET service_id = (
+                    SELECT MIN(keep.id) FROM services AS dup
+                    JOIN services AS keep ON keep.team_id = dup.team_id AND keep.name = dup.name
+                    WHERE dup.id = {table}.service_id
+                )
+                WHERE service_id IN (
+                    SELECT dup.id FROM services AS dup
+                    JOIN services AS keep ON keep.team_id = dup.team_id AND keep.name = dup.name AND keep.id < dup.id
+                )
+                """
+            )
+        )
+    op.execute(
+        sa.text(
+            """
+            DELETE FROM services WHERE EXISTS (
+                SELECT 1 FROM services AS keep
+                WHERE keep.team_id = services.team_id AND keep.name = services.name AND keep.id < services.id
+            )
+            """
+        )
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _merge_duplicate_services()
+    op.create_index("ix_service_team_name", "services", ["team_id", "name"], unique=True)
+    op.create_index("ix_policy_active", "policies", ["service_id", "is_active"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_policy_active", table_name="policies")
+    op.drop_index("ix_service_team_name", table_name="services")
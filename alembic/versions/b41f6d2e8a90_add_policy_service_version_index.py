@@ -0,0 +1,29 @@
+"""add policy service/version index
+
+Revision ID: b41f6d2e8a90
+Revises: 7c3e9a1d4b52
+Create Date: 2026-10-15 11:27:09.604117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b41f6d2e8a90"
+down_revision: Union[str, Sequence[str], None] = "7c3e9a1d4b52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_policy_service_version", "policies", ["service_id", sa.text("version DESC")], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_policy_service_version", table_name="policies")
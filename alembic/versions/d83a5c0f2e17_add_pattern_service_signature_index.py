@@ -0,0 +1,73 @@
+"""add pattern service/signature index
+
+Revision ID: d83a5c0f2e17
+Revises: b41f6d2e8a90
+Create Date: 2026-10-15 14:52:36.218409
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d83a5c0f2e17"
+down_revision: Union[str, Sequence[str], None] = "b41f6d2e8a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _merge_duplicate_patterns() -> None:
+    """
+    Fold patterns sharing (service_id, signature) into the lowest id.
+
+    Concurrent analyses of a service could each insert the same new
+    signature; the kept row takes the combined counts and seen range.
+    """
+    op.execute(
+        sa.text(
+            """
+            UPDATE patterns SET
+                count = merged.count,
+                sampled_count = merged.sampled_count,
+                first_seen = merged.first_seen,
+                last_seen = merged.last_seen
+            FROM (
+                SELECT MIN(id) AS id, SUM(count) AS count, SUM(sampled_count) AS sampled_count,
+                       MIN(first_seen) AS first_seen, MAX(last_seen) AS last_seen
+                FROM patterns
+                GROUP BY service_id, signature
+                HAVING COUNT(*) > 1
+            ) AS merged
+            WHERE patterns.id = merged.id
+            """
+        )
+    )
+    op.execute(
+        sa.text(
+            """
+            DELETE FROM patterns WHERE EXISTS (
+                SELECT 1 FROM patterns AS keep
+                WHERE keep.service_id = patterns.service_id AND keep.signature = patterns.signature
+                AND keep.id < patterns.id
+            )
+            """
+        )
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _merge_duplicate_patterns()
+    op.create_index("ix_pattern_service_signature", "patterns", ["service_id", "signature"], unique=True)
+    op.drop_index(op.f("ix_patterns_signature"), table_name="patterns")
+    op.drop_index(op.f("ix_patterns_service_id"), table_name="patterns")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f("ix_patterns_service_id"), "patterns", ["service_id"], unique=False)
+    op.create_index(op.f("ix_patterns_signature"), "patterns", ["signature"], unique=False)
+    op.drop_index("ix_pattern_service_signature", table_name="patterns")
@@ -1,10 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
 
 from src.integrations.analysis_service import AnalysisService
 from src.integrations.posthog_client import PostHogLogsClient
-from src.storage.database import get_db
 
 router = APIRouter(prefix="/api/v1/analysis", tags=["analysis"])
 
@@ -34,7 +32,7 @@ class AnalyzeResponse(BaseModel):
 
 
 @router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_service_logs(request: AnalyzeRequest, db: Session = Depends(get_db)) -> AnalyzeResponse:
+async def analyze_service_logs(request: AnalyzeRequest) -> AnalyzeResponse:
     """
     Analyze logs for a service from PostHog.
 
@@ -43,7 +41,6 @@ async def analyze_service_logs(request: AnalyzeRequest, db: Session = Depends(ge
 
     Args:
         request: Analysis request with PostHog credentials
-        db: Database session
 
     Returns:
         Analysis results with patterns and anomalies
@@ -62,7 +59,7 @@ async def analyze_service_logs(request: AnalyzeRequest, db: Session = Depends(ge
     analysis_service = AnalysisService(posthog_client)
 
     try:
-        result = await analysis_service.analyze_service(request.team_id, request.service_name, request.hours, db)
+        result = await analysis_service.analyze_service(request.team_id, request.service_name, request.hours)
 
         return AnalyzeResponse(
             status="completed",
@@ -2,6 +2,7 @@ from datetime import datetime
 
 from fastapi import APIRouter, Depends, status
 from pydantic import BaseModel
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from src.storage.database import get_db
@@ -40,7 +41,7 @@ class PatternStatsResponse(BaseModel):
 
 
 @router.post("/stats", response_model=PatternStatsResponse, status_code=status.HTTP_202_ACCEPTED)
-async def receive_pattern_stats(stats: PatternStatsRequest, db: Session = Depends(get_db)) -> PatternStatsResponse:
+def receive_pattern_stats(stats: PatternStatsRequest, db: Session = Depends(get_db)) -> PatternStatsResponse:
     """
     Receive pattern statistics from SDK.
     This triggers async analysis and policy generation.
@@ -48,31 +49,35 @@ async def receive_pattern_stats(stats: PatternStatsRequest, db: Session = Depend
     Called by SDKs periodically (e.g., every 15 minutes) to upload
     local pattern statistics for AI analysis.
     """
-    service = db.query(Service).filter(Service.name == stats.service_name, Service.team_id == stats.team_id).first()
-
-    if not service:
-        service = Service(team_id=stats.team_id, name=stats.service_name, is_active=True)
-        db.add(service)
-        db.commit()
-        db.refresh(service)
-
-    analysis_run = AnalysisRun(
-        service_id=service.id,
-        status="pending",
-        logs_analyzed=stats.total_logs,
-        patterns_found=stats.unique_patterns,
-        run_metadata={
-            "pattern_count": len(stats.patterns),
-            "source": "sdk_upload",
-            "timestamp": stats.timestamp,
-        },
-    )
-    db.add(analysis_run)
+    # Get-or-create in one statement: concurrent first uploads for a service
+    # resolve on ix_service_team_name instead of racing a select and insert.
+    # The no-op update makes RETURNING yield the existing row's id.
+    upsert = insert(Service).values(team_id=stats.team_id, name=stats.service_name, is_active=True)
+    service_id = db.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[Service.team_id, Service.name], set_={"name": upsert.excluded.name}
+        ).returning(Service.id)
+    ).scalar_one()
+
+    analysis_run_id = db.execute(
+        insert(AnalysisRun)
+        .values(
+            service_id=service_id,
+            status="pending",
+            logs_analyzed=stats.total_logs,
+            patterns_found=stats.unique_patterns,
+            run_metadata={
+                "pattern_count": len(stats.patterns),
+                "source": "sdk_upload",
+                "timestamp": stats.timestamp,
+            },
+        )
+        .returning(AnalysisRun.id)
+    ).scalar_one()
     db.commit()
-    db.refresh(analysis_run)
 
     return PatternStatsResponse(
         status="accepted",
         message=f"Pattern stats received for {stats.service_name}. Analysis queued.",
-        analysis_run_id=analysis_run.id,
+        analysis_run_id=analysis_run_id,
     )
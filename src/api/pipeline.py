@@ -1,18 +1,33 @@
 import os
+from collections.abc import Callable
+from functools import lru_cache
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-
-from src.engine.llm_provider import AnthropicProvider, OpenAIProvider, RuleBasedProvider
+from sqlalchemy import func, insert, select, update
+
+from src.api.policies import invalidate_policy_cache
+from src.engine.llm_provider import (
+    AnthropicProvider,
+    LLMProvider,
+    OpenAIProvider,
+    PolicyResponse as LLMPolicyResponse,
+    RuleBasedProvider,
+)
+from src.engine.policy_cache import PolicyCache, RedisBackend
 from src.engine.policy_generator import PolicyGenerator
 from src.integrations.analysis_service import AnalysisService
 from src.integrations.posthog_client import PostHogLogsClient
-from src.storage.database import get_db
+from src.storage.database import SessionLocal
 from src.storage.models import Policy, Service
 
 router = APIRouter(prefix="/api/v1/pipeline", tags=["pipeline"])
 
+# Shared across workers when REDIS_URL is set, otherwise per process.
+_redis_url = os.getenv("REDIS_URL")
+_policy_cache = PolicyCache(RedisBackend(_redis_url) if _redis_url else None)
+
 
 class GeneratePolicyRequest(BaseModel):
     """Request to analyze logs and generate policy."""
@@ -43,9 +58,7 @@ class GeneratePolicyResponse(BaseModel):
 
 
 @router.post("/generate-policy", response_model=GeneratePolicyResponse)
-async def generate_policy_from_logs(
-    request: GeneratePolicyRequest, db: Session = Depends(get_db)
-) -> GeneratePolicyResponse:
+async def generate_policy_from_logs(request: GeneratePolicyRequest) -> GeneratePolicyResponse:
     """
     Complete pipeline: Fetch logs from PostHog → Analyze → Generate AI policy.
 
@@ -56,9 +69,11 @@ async def generate_policy_from_logs(
     4. Store policy in database
     5. Return policy for SDK to use
 
+    No database session is held while waiting on the LLM: the analysis and
+    the policy write each use their own short-lived session.
+
     Args:
         request: Pipeline request with PostHog and LLM configuration
-        db: Database session
 
     Returns:
         Generated policy with analysis summary
@@ -73,54 +88,38 @@ async def generate_policy_from_logs(
     analysis_service = AnalysisService(posthog_client)
 
     try:
-        analysis_result = await analysis_service.analyze_service(
-            request.team_id, request.service_name, request.hours, db
-        )
+        analysis_result = await analysis_service.analyze_service(request.team_id, request.service_name, request.hours)
 
-        llm_provider = _get_llm_provider(request.llm_provider)
-        policy_generator = PolicyGenerator(llm_provider)
-
-        policy_response = await policy_generator.generate_policy(
-            request.service_name, analysis_result, request.cost_target
+        cache_key = PolicyCache.make_key(
+            request.llm_provider, request.service_name, analysis_result, request.cost_target
         )
+        policy_response = await _policy_cache.get(cache_key)
 
-        service = db.query(Service).filter(Service.team_id == request.team_id, Service.name == request.service_name).first()
+        if policy_response is None:
+            policy_generator = _get_policy_generator(request.llm_provider)
 
-        if not service:
-            raise HTTPException(status_code=404, detail="Service not found")
+            policy_response = await policy_generator.generate_policy(
+                request.service_name, analysis_result, request.cost_target
+            )
+            await _policy_cache.set(cache_key, policy_response)
 
-        existing_policies = db.query(Policy).filter(Policy.service_id == service.id).all()
-        for p in existing_policies:
-            p.is_active = False
+        generated_by = "llm" if request.llm_provider != "rule-based" else "rule-based"
 
-        next_version = max([p.version for p in existing_policies], default=0) + 1
+        policy_id, policy_version = await run_in_threadpool(
+            _store_policy, request.team_id, request.service_name, policy_response, generated_by
+        )
+        invalidate_policy_cache(request.team_id, request.service_name)
 
-        new_policy = Policy(
-            service_id=service.id,
-            version=next_version,
+        return GeneratePolicyResponse(
+            status="success",
+            policy_id=policy_id,
+            policy_version=policy_version,
             global_rate=policy_response.global_rate,
             severity_rates=policy_response.severity_rates,
             pattern_rates=policy_response.pattern_rates,
             anomaly_boost=policy_response.anomaly_boost,
-            reasoning=policy_response.reasoning,
-            generated_by="llm" if request.llm_provider != "rule-based" else "rule-based",
-            llm_model=policy_response.model,
-            is_active=True,
-        )
-        db.add(new_policy)
-        db.commit()
-        db.refresh(new_policy)
-
-        return GeneratePolicyResponse(
-            status="success",
-            policy_id=new_policy.id,
-            policy_version=new_policy.version,
-            global_rate=new_policy.global_rate,
-            severity_rates=new_policy.severity_rates,
-            pattern_rates=new_policy.pattern_rates,
-            anomaly_boost=new_policy.anomaly_boost,
-            reasoning=new_policy.reasoning or "",
-            generated_by=new_policy.generated_by,
+            reasoning=policy_response.reasoning or "",
+            generated_by=generated_by,
             analysis_summary=analysis_result.summary,
         )
 
@@ -128,23 +127,94 @@ async def generate_policy_from_logs(
         raise HTTPException(status_code=500, detail=f"Pipeline failed: {str(e)}")
 
 
-def _get_llm_provider(provider_name: str):
-    """Get LLM provider instance based on configuration."""
-    if provider_name == "openai":
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable required")
-        return OpenAIProvider(api_key=api_key)
+def _store_policy(
+    team_id: int, service_name: str, policy_response: LLMPolicyResponse, generated_by: str
+) -> tuple[int, int]:
+    """
+    Deactivate the service's current policy and insert the new one as the next version.
+
+    Opens its own session and runs synchronously in one transaction; call it
+    from a worker thread so the database round-trips don't block the event loop.
+
+    Returns:
+        (policy_id, policy_version) of the inserted policy
+    """
+    with SessionLocal() as db, db.begin():
+        service_id = db.execute(
+            select(Service.id).where(Service.team_id == team_id, Service.name == service_name)
+        ).scalar_one_or_none()
+
+        if service_id is None:
+            raise HTTPException(status_code=404, detail="Service not found")
+
+        db.execute(
+            update(Policy)
+            .where(Policy.service_id == service_id, Policy.is_active == True)  # noqa: E712
+            .values(is_active=False)
+        )
+
+        next_version = db.execute(
+            select(func.coalesce(func.max(Policy.version), 0) + 1).where(Policy.service_id == service_id)
+        ).scalar()
+
+        row = db.execute(
+            insert(Policy)
+            .values(
+                service_id=service_id,
+                version=next_version,
+                global_rate=policy_response.global_rate,
+                severity_rates=policy_response.severity_rates,
+                pattern_rates=policy_response.pattern_rates,
+                anomaly_boost=policy_response.anomaly_boost,
+                reasoning=policy_response.reasoning,
+                generated_by=generated_by,
+                llm_model=policy_response.model,
+                is_active=True,
+            )
+            .returning(Policy.id, Policy.version)
+        ).one()
+
+    return row.id, row.version
+
+
+def _require_env(name: str) -> str:
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(f"{name} environment variable required")
+    return value
+
+
+_PROVIDER_FACTORIES: dict[str, Callable[[], LLMProvider]] = {
+    "openai": lambda: OpenAIProvider(api_key=_require_env("OPENAI_API_KEY")),
+    "anthropic": lambda: AnthropicProvider(api_key=_require_env("ANTHROPIC_API_KEY")),
+    "rule-based": RuleBasedProvider,
+}
+
+
+@lru_cache(maxsize=4)
+def _get_llm_provider(provider_name: str) -> LLMProvider:
+    """
+    Get LLM provider instance based on configuration.
+
+    Instances are cached per provider name so the underlying HTTP client and
+    its connection pool are reused across requests. A missing API key raises
+    and is not cached; a key change takes effect after
+    ``_get_llm_provider.cache_clear()`` or a restart.
+    """
+    try:
+        factory = _PROVIDER_FACTORIES[provider_name]
+    except KeyError:
+        raise ValueError(f"Unknown LLM provider: {provider_name}") from None
+    return factory()
 
-    elif provider_name == "anthropic":
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable required")
-        return AnthropicProvider(api_key=api_key)
 
-    elif provider_name == "rule-based":
-        return RuleBasedProvider()
+@lru_cache(maxsize=4)
+def _get_policy_generator(provider_name: str) -> PolicyGenerator:
+    """Get the policy generator for a provider, reused so its in-process policy cache persists."""
+    return PolicyGenerator(_get_llm_provider(provider_name))
 
-    else:
-        raise ValueError(f"Unknown LLM provider: {provider_name}")
 
+def clear_provider_cache() -> None:
+    """Drop cached providers and generators (called on app shutdown; they hold the closed HTTP pool)."""
+    _get_policy_generator.cache_clear()
+    _get_llm_provider.cache_clear()
@@ -1,7 +1,12 @@
+import threading
+from collections.abc import Iterable, Iterator
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from src.storage.database import get_db
@@ -9,6 +14,10 @@ from src.storage.models import Policy, Service
 
 router = APIRouter(prefix="/api/v1/policies", tags=["policies"])
 
+POLICY_CACHE_TTL_SECONDS = 60
+MAX_PAGE_SIZE = 200
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 class PolicyResponse(BaseModel):
     model_config = {"from_attributes": True}
@@ -35,69 +44,152 @@ class PolicyHistoryItem(BaseModel):
     created_at: datetime
 
 
+_HISTORY_ADAPTER = TypeAdapter(list[PolicyHistoryItem])
+
+
+# Conservative policy served when no AI policy exists yet: always keeps
+# errors, samples INFO/DEBUG conservatively. Built once and shared read-only.
+_DEFAULT_POLICY = PolicyResponse(
+    global_rate=1.0,
+    severity_rates={
+        "DEBUG": 0.1,
+        "INFO": 0.3,
+        "WARNING": 0.7,
+        "ERROR": 1.0,
+        "CRITICAL": 1.0,
+    },
+    pattern_rates={},
+    anomaly_boost=2.0,
+    reasoning="Default policy - no AI analysis performed yet",
+    generated_by="default",
+    llm_model=None,
+    version=0,
+)
+
+
+# SDKs poll get_policy on every refresh, while policies only change when the
+# pipeline writes a new version. Cache the validated response per
+# (team_id, service_name); the pipeline invalidates the entry after a write.
+_policy_cache: TTLCache[tuple[int, str], PolicyResponse] = TTLCache(maxsize=10_000, ttl=POLICY_CACHE_TTL_SECONDS)
+_policy_cache_lock = threading.Lock()
+# Striped per-key locks so concurrent misses for the same service load it once.
+_policy_load_locks = [threading.Lock() for _ in range(64)]
+
+
+def invalidate_policy_cache(team_id: int, service_name: str) -> None:
+    """Drop the cached policy for a service so the next request reloads it."""
+    with _policy_cache_lock:
+        _policy_cache.pop((team_id, service_name), None)
+
+
+def clear_policy_cache() -> None:
+    """Drop all cached policies."""
+    with _policy_cache_lock:
+        _policy_cache.clear()
+
+
 @router.get("/{service_name}", response_model=PolicyResponse)
-async def get_policy(service_name: str, team_id: int, db: Session = Depends(get_db)) -> PolicyResponse:
+def get_policy(service_name: str, team_id: int, db: Session = Depends(get_db)) -> PolicyResponse:
     """
     Get current active sampling policy for a service.
     This is called by SDKs to fetch sampling rules.
+
+    Responses are cached for POLICY_CACHE_TTL_SECONDS per process.
     """
-    service = db.query(Service).filter(Service.name == service_name, Service.team_id == team_id).first()
+    key = (team_id, service_name)
 
-    if not service:
-        raise HTTPException(status_code=404, detail=f"Service '{service_name}' not found for team {team_id}")
+    with _policy_cache_lock:
+        cached = _policy_cache.get(key)
+    if cached is not None:
+        return cached
 
-    active_policy = (
-        db.query(Policy).filter(Policy.service_id == service.id, Policy.is_active == True).first()  # noqa: E712
-    )
+    with _policy_load_locks[hash(key) % len(_policy_load_locks)]:
+        with _policy_cache_lock:
+            cached = _policy_cache.get(key)
+        if cached is not None:
+            return cached
 
-    if not active_policy:
-        return _default_policy()
+        policy = _load_policy(db, service_name, team_id)
+
+        with _policy_cache_lock:
+            _policy_cache[key] = policy
+
+    return policy
+
+
+def _load_policy(db: Session, service_name: str, team_id: int) -> PolicyResponse:
+    """Load the active policy for a service, falling back to the default policy.
+
+    Resolves the service and its active policy in one query: the outer join
+    yields a row with ``Policy`` set to None when the service exists but has
+    no active policy, and no row at all when the service does not exist.
+    """
+    row = db.execute(
+        select(Service.id, Policy)
+        .outerjoin(Policy, (Policy.service_id == Service.id) & (Policy.is_active == True))  # noqa: E712
+        .where(Service.team_id == team_id, Service.name == service_name)
+        .limit(1)
+    ).first()
+
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Service '{service_name}' not found for team {team_id}")
+
+    active_policy = row.Policy
+    if active_policy is None:
+        return _DEFAULT_POLICY
 
     return PolicyResponse.model_validate(active_policy)
 
 
 @router.get("/{service_name}/history", response_model=list[PolicyHistoryItem])
-async def get_policy_history(
-    service_name: str, team_id: int, limit: int = 10, db: Session = Depends(get_db)
-) -> list[PolicyHistoryItem]:
+def get_policy_history(
+    service_name: str,
+    team_id: int,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    accept: str | None = Header(None),
+    db: Session = Depends(get_db),
+) -> list[PolicyHistoryItem] | StreamingResponse:
     """
-    Get policy history for a service.
+    Get policy history for a service, newest version first.
     Useful for debugging and understanding policy evolution.
+
+    Clients sending ``Accept: application/x-ndjson`` get one JSON object per
+    line, streamed as rows come back from the database instead of being
+    collected into a list first.
     """
-    service = db.query(Service).filter(Service.name == service_name, Service.team_id == team_id).first()
+    service_id = db.execute(
+        select(Service.id).where(Service.name == service_name, Service.team_id == team_id)
+    ).scalar_one_or_none()
 
-    if not service:
+    if service_id is None:
         raise HTTPException(status_code=404, detail=f"Service '{service_name}' not found")
 
-    policies = (
-        db.query(Policy)
-        .filter(Policy.service_id == service.id)
+    # Only the columns PolicyHistoryItem exposes; skip pattern_rates and reasoning.
+    query = (
+        select(
+            Policy.id,
+            Policy.version,
+            Policy.global_rate,
+            Policy.severity_rates,
+            Policy.generated_by,
+            Policy.is_active,
+            Policy.created_at,
+        )
+        .where(Policy.service_id == service_id)
         .order_by(Policy.version.desc())
+        .offset(offset)
         .limit(limit)
-        .all()
     )
 
-    return [PolicyHistoryItem.model_validate(p) for p in policies]
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        rows = db.execute(query.execution_options(yield_per=50))
+        return StreamingResponse(_iter_ndjson(rows), media_type=NDJSON_MEDIA_TYPE)
 
+    return _HISTORY_ADAPTER.validate_python(db.execute(query).all(), from_attributes=True)
 
-def _default_policy() -> PolicyResponse:
-    """
-    Return default conservative policy when no AI policy exists.
-    Always keeps errors, samples INFO/DEBUG conservatively.
-    """
-    return PolicyResponse(
-        global_rate=1.0,
-        severity_rates={
-            "DEBUG": 0.1,
-            "INFO": 0.3,
-            "WARNING": 0.7,
-            "ERROR": 1.0,
-            "CRITICAL": 1.0,
-        },
-        pattern_rates={},
-        anomaly_boost=2.0,
-        reasoning="Default policy - no AI analysis performed yet",
-        generated_by="default",
-        llm_model=None,
-        version=0,
-    )
+
+def _iter_ndjson(rows: Iterable) -> Iterator[bytes]:
+    """Serialize policy history rows as newline-delimited JSON."""
+    for row in rows:
+        yield PolicyHistoryItem.model_validate(row, from_attributes=True).model_dump_json().encode() + b"\n"
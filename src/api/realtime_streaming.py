@@ -4,11 +4,13 @@ Real-Time Streaming API endpoints
 
 import asyncio
 import json
+import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from src.realtime_streaming import (
@@ -23,13 +25,25 @@ _streaming_service: Optional[RealTimeStreamService] = None
 
 
 def get_streaming_service() -> RealTimeStreamService:
-    """Get or create the global streaming service"""
+    """Get the global streaming service (started by the app lifespan)"""
     global _streaming_service
     if _streaming_service is None:
+        # Only reached when the lifespan did not run, e.g. a bare TestClient
         _streaming_service = RealTimeStreamService()
     return _streaming_service
 
 
+async def start_streaming_service() -> None:
+    """Create and start the global streaming service once at app startup"""
+    await get_streaming_service().start()
+
+
+async def stop_streaming_service() -> None:
+    """Stop the global streaming service at app shutdown"""
+    if _streaming_service is not None:
+        await _streaming_service.stop()
+
+
 # Data Models
 class StreamStatus(BaseModel):
     """Streaming service status"""
@@ -41,14 +55,8 @@ class StreamStatus(BaseModel):
     last_updated: datetime
 
 
-class StreamConfiguration(BaseModel):
-    """Streaming configuration"""
-    buffer_size: int = Field(default=1000, ge=1, le=10000)
-    flush_interval: float = Field(default=1.0, ge=0.1, le=60.0)
-    max_connections: int = Field(default=100, ge=1, le=1000)
-    enable_compression: bool = Field(default=True)
-    enable_batching: bool = Field(default=True)
-    batch_size: int = Field(default=100, ge=1, le=1000)
+class StreamConfiguration(StreamConfig):
+    """Streaming configuration; validated once by FastAPI and used as-is"""
 
 
 class LogStreamRequest(BaseModel):
@@ -80,11 +88,6 @@ async def websocket_stream(websocket: WebSocket):
     - Get real-time updates
     """
     service = get_streaming_service()
-    
-    # Start service if not running
-    if not service._running:
-        await service.start()
-    
     await service.handle_websocket(websocket)
 
 
@@ -98,8 +101,7 @@ async def start_streaming(config: StreamConfiguration = None):
         
         if config:
             # Update configuration
-            stream_config = StreamConfig(**config.dict())
-            service.config = stream_config
+            service.config = config
         
         if not service._running:
             await service.start()
@@ -110,7 +112,7 @@ async def start_streaming(config: StreamConfiguration = None):
             logs_processed=0,
             processing_time_ms=0.0,
             metadata={
-                "config": service.config.dict(),
+                "config": service.config.model_dump(),
                 "started_at": datetime.utcnow().isoformat()
             }
         )
@@ -152,16 +154,12 @@ async def stream_logs(request: LogStreamRequest):
     try:
         service = get_streaming_service()
         
-        if not service._running:
-            await service.start()
-        
-        start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         
-        # Add logs to processor
-        for log in request.logs:
-            await service.processor.add_log(log)
+        # Hand the whole batch to the processor at once
+        await service.processor.add_logs(request.logs)
         
-        processing_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+        processing_time = (time.perf_counter_ns() - start_ns) / 1e6
         
         return StreamResponse(
             success=True,
@@ -170,7 +168,8 @@ async def stream_logs(request: LogStreamRequest):
             processing_time_ms=processing_time,
             metadata={
                 "batch_id": request.batch_id,
-                "streamed_at": datetime.utcnow().isoformat()
+                # Serialized to ISO 8601 with the response
+                "streamed_at": datetime.utcnow()
             }
         )
         
@@ -214,13 +213,27 @@ async def get_streaming_metrics():
 
 
 @router.get("/alerts", response_model=List[StreamAlert])
-async def get_streaming_alerts(limit: int = 50):
+async def get_streaming_alerts(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    accept: Optional[str] = Header(None)
+):
     """
-    Get recent streaming alerts.
+    Get recent streaming alerts, newest last; offset skips the newest ones.
+    
+    Send `Accept: application/x-ndjson` to receive one alert per line as a
+    streamed response.
     """
     try:
         service = get_streaming_service()
-        alerts = service.processor.get_alerts(limit)
+        alerts = service.processor.get_alerts(limit, offset)
+        
+        if accept and "application/x-ndjson" in accept:
+            return StreamingResponse(
+                (alert.model_dump_json() + "\n" for alert in alerts),
+                media_type="application/x-ndjson"
+            )
+        
         return alerts
         
     except Exception as e:
@@ -235,13 +248,10 @@ async def acknowledge_alert(alert_id: str):
     try:
         service = get_streaming_service()
         
-        # Find and acknowledge alert
-        for alert in service.processor.alerts:
-            if alert.id == alert_id:
-                alert.acknowledged = True
-                break
-        else:
+        alert = service.processor.get_alert(alert_id)
+        if alert is None:
             raise HTTPException(status_code=404, detail="Alert not found")
+        alert.acknowledged = True
         
         return {"success": True, "message": "Alert acknowledged"}
         
@@ -285,8 +295,7 @@ async def configure_streaming(config: StreamConfiguration):
         service = get_streaming_service()
         
         # Update configuration
-        stream_config = StreamConfig(**config.dict())
-        service.config = stream_config
+        service.config = config
         
         # Restart service with new configuration if running
         if service._running:
@@ -296,7 +305,7 @@ async def configure_streaming(config: StreamConfiguration):
         return {
             "success": True,
             "message": "Streaming configuration updated",
-            "config": config.dict()
+            "config": config.model_dump()
         }
         
     except Exception as e:
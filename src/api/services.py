@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from src.storage.database import get_db
@@ -22,30 +24,41 @@ class ServiceResponse(BaseModel):
     is_active: bool
 
 
+_SERVICES_ADAPTER = TypeAdapter(list[ServiceResponse])
+
+
 @router.post("/", response_model=ServiceResponse, status_code=201)
-async def create_service(service: ServiceCreate, db: Session = Depends(get_db)) -> ServiceResponse:
+def create_service(service: ServiceCreate, db: Session = Depends(get_db)) -> ServiceResponse:
     """Create a new service to monitor."""
-    db_service = Service(team_id=service.team_id, name=service.name)
-    db.add(db_service)
-    db.commit()
-    db.refresh(db_service)
-    return ServiceResponse.model_validate(db_service)
+    try:
+        row = db.execute(
+            insert(Service)
+            .values(team_id=service.team_id, name=service.name)
+            .returning(Service.id, Service.team_id, Service.name, Service.is_active)
+        ).one()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=409, detail=f"Service '{service.name}' already exists for team {service.team_id}"
+        ) from None
+    return ServiceResponse.model_validate(row, from_attributes=True)
 
 
 @router.get("/{service_id}", response_model=ServiceResponse)
-async def get_service(service_id: int, db: Session = Depends(get_db)) -> ServiceResponse:
+def get_service(service_id: int, db: Session = Depends(get_db)) -> ServiceResponse:
     """Get service by ID."""
-    service = db.query(Service).filter(Service.id == service_id).first()
+    service = db.get(Service, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     return ServiceResponse.model_validate(service)
 
 
 @router.get("/", response_model=list[ServiceResponse])
-async def list_services(team_id: int | None = None, db: Session = Depends(get_db)) -> list[ServiceResponse]:
+def list_services(team_id: int | None = None, db: Session = Depends(get_db)) -> list[ServiceResponse]:
     """List all services, optionally filtered by team_id."""
-    query = db.query(Service)
+    query = select(Service)
     if team_id:
-        query = query.filter(Service.team_id == team_id)
-    services = query.all()
-    return [ServiceResponse.model_validate(s) for s in services]
+        query = query.where(Service.team_id == team_id)
+    services = db.execute(query).scalars().all()
+    return _SERVICES_ADAPTER.validate_python(services, from_attributes=True)
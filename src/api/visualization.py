@@ -2,13 +2,15 @@
 Advanced Visualization API endpoints
 """
 
-import json
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
+import orjson
+from cachetools import TTLCache, cached
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 from src.visualization import (
     VisualizationConfig, ClusterVisualization, CorrelationTimeline,
@@ -21,6 +23,68 @@ from src.realtime_streaming import StreamMetrics
 
 router = APIRouter(prefix="/api/v1/visualization", tags=["visualization"])
 
+# Visualizers and generators are stateless, so one instance serves every request
+_CLUSTER_VISUALIZER = ClusterVisualizer()
+_CORRELATION_VISUALIZER = CorrelationTimelineVisualizer()
+_INSIGHT_GENERATOR = InsightDashboardGenerator()
+_METRICS_GENERATOR = MetricsDashboardGenerator()
+
+# Serializers for dashboard payloads, built once at import
+_CLUSTERS_ADAPTER = TypeAdapter(List[ClusterVisualization])
+_TIMELINES_ADAPTER = TypeAdapter(List[CorrelationTimeline])
+
+# The insights and metrics mocks carry trend series relative to "now", so
+# they are only reused briefly instead of cached for the process lifetime.
+MOCK_DASHBOARD_TTL_SECONDS = 1.0
+
+# Sample chart data served by /chart, built once since it never changes
+_CHART_TEMPLATES: Dict[str, ChartData] = {
+    "line": ChartData(
+        labels=[f"Point {i}" for i in range(10)],
+        datasets=[{
+            "label": "Sample Data",
+            "data": [i * 10 for i in range(10)],
+            "borderColor": "#4444ff",
+            "backgroundColor": "rgba(68, 68, 255, 0.1)"
+        }],
+        options={
+            "responsive": True,
+            "scales": {
+                "y": {"beginAtZero": True}
+            }
+        }
+    ),
+    "bar": ChartData(
+        labels=["Error", "Warning", "Info", "Debug"],
+        datasets=[{
+            "label": "Log Levels",
+            "data": [45, 23, 120, 8],
+            "backgroundColor": ["#ff4444", "#ffaa44", "#4444ff", "#44ff44"]
+        }],
+        options={
+            "responsive": True,
+            "scales": {
+                "y": {"beginAtZero": True}
+            }
+        }
+    ),
+    "scatter": ChartData(
+        labels=["Cluster 1", "Cluster 2", "Cluster 3"],
+        datasets=[{
+            "label": "Log Clusters",
+            "data": [{"x": 0.2, "y": 0.3}, {"x": 0.7, "y": 0.6}, {"x": 0.4, "y": 0.8}],
+            "backgroundColor": ["#ff4444", "#4444ff", "#44ff44"]
+        }],
+        options={
+            "responsive": True,
+            "scales": {
+                "x": {"min": 0, "max": 1},
+                "y": {"min": 0, "max": 1}
+            }
+        }
+    ),
+}
+
 # Global dashboard manager instance
 _dashboard_manager: Optional[DashboardManager] = None
 
@@ -57,6 +121,32 @@ class DashboardConfig(BaseModel):
     enable_animations: bool = Field(default=True)
     theme: str = Field(default="dark", pattern="^(dark|light)$")
     chart_types: List[str] = Field(default=["line", "bar", "scatter", "heatmap"])
+    compress_frames: bool = Field(default=False)
+
+
+class ConfigureResponse(BaseModel):
+    """Result of a dashboard configuration update"""
+    success: bool
+    message: str
+    config: DashboardConfig
+
+
+class DashboardStatusResponse(BaseModel):
+    """Current dashboard status"""
+    running: bool
+    active_connections: int
+    config: VisualizationConfig
+    timestamp: str
+
+
+class HealthResponse(BaseModel):
+    """Visualization service health"""
+    status: str
+    service: str
+    running: Optional[bool] = None
+    active_connections: Optional[int] = None
+    error: Optional[str] = None
+    timestamp: str
 
 
 # API Endpoints
@@ -84,7 +174,7 @@ async def dashboard_websocket(websocket: WebSocket):
         while True:
             # Handle incoming messages
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             
             await _handle_dashboard_message(websocket, message)
             
@@ -108,12 +198,13 @@ async def _handle_dashboard_message(websocket: WebSocket, message: Dict[str, Any
     elif message_type == "get_metrics":
         await _send_metrics_dashboard(websocket)
     elif message_type == "ping":
-        pong = {"type": "pong", "timestamp": datetime.utcnow().isoformat()}
-        await websocket.send_text(json.dumps(pong, default=str))
+        pong = {"type": "pong", "timestamp": datetime.utcnow()}
+        get_dashboard_manager().enqueue(websocket, pong)
 
 
-async def _send_cluster_visualization(websocket: WebSocket):
-    """Send cluster visualization data"""
+@lru_cache(maxsize=1)
+def _mock_cluster_visualization() -> List[Dict[str, Any]]:
+    """Build the mock cluster payload once; it does not depend on the clock"""
     # Mock cluster data (in production, get from actual analysis)
     clusters = [
         LogCluster(
@@ -130,19 +221,12 @@ async def _send_cluster_visualization(websocket: WebSocket):
         )
     ]
     
-    visualizer = ClusterVisualizer()
-    visualization_data = visualizer.visualize_clusters(clusters)
-    
-    message = {
-        "type": "cluster_visualization",
-        "data": [cluster.dict() for cluster in visualization_data],
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    await websocket.send_text(json.dumps(message, default=str))
+    return _CLUSTERS_ADAPTER.dump_python(_CLUSTER_VISUALIZER.visualize_clusters(clusters), mode="json")
 
 
-async def _send_correlation_timeline(websocket: WebSocket):
-    """Send correlation timeline data"""
+@lru_cache(maxsize=1)
+def _mock_correlation_timeline() -> List[Dict[str, Any]]:
+    """Build the mock correlation payload once; it does not depend on the clock"""
     # Mock correlation data
     correlations = [
         CorrelationPattern(
@@ -154,19 +238,12 @@ async def _send_correlation_timeline(websocket: WebSocket):
         )
     ]
     
-    visualizer = CorrelationTimelineVisualizer()
-    timeline_data = visualizer.visualize_correlations(correlations)
-    
-    message = {
-        "type": "correlation_timeline",
-        "data": [timeline.dict() for timeline in timeline_data],
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    await websocket.send_text(json.dumps(message, default=str))
+    return _TIMELINES_ADAPTER.dump_python(_CORRELATION_VISUALIZER.visualize_correlations(correlations), mode="json")
 
 
-async def _send_insights_dashboard(websocket: WebSocket):
-    """Send insights dashboard data"""
+@cached(TTLCache(maxsize=1, ttl=MOCK_DASHBOARD_TTL_SECONDS))
+def _mock_insights_dashboard() -> Dict[str, Any]:
+    """Build the mock insights payload, reused until its trend data goes stale"""
     # Mock insights data
     insights = [
         LogInsight(
@@ -189,19 +266,12 @@ async def _send_insights_dashboard(websocket: WebSocket):
         )
     ]
     
-    generator = InsightDashboardGenerator()
-    dashboard_data = generator.generate_dashboard(insights)
-    
-    message = {
-        "type": "insights_dashboard",
-        "data": dashboard_data.dict(),
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    await websocket.send_text(json.dumps(message, default=str))
+    return _INSIGHT_GENERATOR.generate_dashboard(insights).model_dump(mode="json")
 
 
-async def _send_metrics_dashboard(websocket: WebSocket):
-    """Send metrics dashboard data"""
+@cached(TTLCache(maxsize=1, ttl=MOCK_DASHBOARD_TTL_SECONDS))
+def _mock_metrics_dashboard() -> Dict[str, Any]:
+    """Build the mock metrics payload, reused until its trend data goes stale"""
     # Mock metrics data
     metrics = StreamMetrics(
         logs_received=1000,
@@ -213,15 +283,47 @@ async def _send_metrics_dashboard(websocket: WebSocket):
         error_count=10
     )
     
-    generator = MetricsDashboardGenerator()
-    dashboard_data = generator.generate_dashboard(metrics)
-    
+    return _METRICS_GENERATOR.generate_dashboard(metrics).model_dump(mode="json")
+
+
+async def _send_cluster_visualization(websocket: WebSocket):
+    """Send cluster visualization data"""
+    message = {
+        "type": "cluster_visualization",
+        "data": _mock_cluster_visualization(),
+        "timestamp": datetime.utcnow()
+    }
+    get_dashboard_manager().enqueue(websocket, message)
+
+
+async def _send_correlation_timeline(websocket: WebSocket):
+    """Send correlation timeline data"""
+    message = {
+        "type": "correlation_timeline",
+        "data": _mock_correlation_timeline(),
+        "timestamp": datetime.utcnow()
+    }
+    get_dashboard_manager().enqueue(websocket, message)
+
+
+async def _send_insights_dashboard(websocket: WebSocket):
+    """Send insights dashboard data"""
+    message = {
+        "type": "insights_dashboard",
+        "data": _mock_insights_dashboard(),
+        "timestamp": datetime.utcnow()
+    }
+    get_dashboard_manager().enqueue(websocket, message)
+
+
+async def _send_metrics_dashboard(websocket: WebSocket):
+    """Send metrics dashboard data"""
     message = {
         "type": "metrics_dashboard",
-        "data": dashboard_data.dict(),
-        "timestamp": datetime.utcnow().isoformat()
+        "data": _mock_metrics_dashboard(),
+        "timestamp": datetime.utcnow()
     }
-    await websocket.send_text(json.dumps(message, default=str))
+    get_dashboard_manager().enqueue(websocket, message)
 
 
 @router.post("/clusters", response_model=List[ClusterVisualization])
@@ -233,8 +335,7 @@ async def get_cluster_visualization(
     Generate cluster visualization data.
     """
     try:
-        visualizer = ClusterVisualizer()
-        visualization_data = visualizer.visualize_clusters(clusters)
+        visualization_data = _CLUSTER_VISUALIZER.visualize_clusters(clusters)
         
         return visualization_data
         
@@ -251,8 +352,7 @@ async def get_correlation_timeline(
     Generate correlation timeline visualization data.
     """
     try:
-        visualizer = CorrelationTimelineVisualizer()
-        timeline_data = visualizer.visualize_correlations(correlations)
+        timeline_data = _CORRELATION_VISUALIZER.visualize_correlations(correlations)
         
         return timeline_data
         
@@ -269,8 +369,7 @@ async def get_insights_dashboard(
     Generate insights dashboard data.
     """
     try:
-        generator = InsightDashboardGenerator()
-        dashboard_data = generator.generate_dashboard(insights)
+        dashboard_data = _INSIGHT_GENERATOR.generate_dashboard(insights)
         
         return dashboard_data
         
@@ -287,8 +386,7 @@ async def get_metrics_dashboard(
     Generate metrics dashboard data.
     """
     try:
-        generator = MetricsDashboardGenerator()
-        dashboard_data = generator.generate_dashboard(metrics)
+        dashboard_data = _METRICS_GENERATOR.generate_dashboard(metrics)
         
         return dashboard_data
         
@@ -305,65 +403,14 @@ async def generate_chart_data(
     """
     Generate generic chart data for various visualization types.
     """
-    try:
-        # Generate chart data based on type
-        if chart_type == "line":
-            chart_data = ChartData(
-                labels=[f"Point {i}" for i in range(10)],
-                datasets=[{
-                    "label": "Sample Data",
-                    "data": [i * 10 for i in range(10)],
-                    "borderColor": "#4444ff",
-                    "backgroundColor": "rgba(68, 68, 255, 0.1)"
-                }],
-                options={
-                    "responsive": True,
-                    "scales": {
-                        "y": {"beginAtZero": True}
-                    }
-                }
-            )
-        elif chart_type == "bar":
-            chart_data = ChartData(
-                labels=["Error", "Warning", "Info", "Debug"],
-                datasets=[{
-                    "label": "Log Levels",
-                    "data": [45, 23, 120, 8],
-                    "backgroundColor": ["#ff4444", "#ffaa44", "#4444ff", "#44ff44"]
-                }],
-                options={
-                    "responsive": True,
-                    "scales": {
-                        "y": {"beginAtZero": True}
-                    }
-                }
-            )
-        elif chart_type == "scatter":
-            chart_data = ChartData(
-                labels=["Cluster 1", "Cluster 2", "Cluster 3"],
-                datasets=[{
-                    "label": "Log Clusters",
-                    "data": [{"x": 0.2, "y": 0.3}, {"x": 0.7, "y": 0.6}, {"x": 0.4, "y": 0.8}],
-                    "backgroundColor": ["#ff4444", "#4444ff", "#44ff44"]
-                }],
-                options={
-                    "responsive": True,
-                    "scales": {
-                        "x": {"min": 0, "max": 1},
-                        "y": {"min": 0, "max": 1}
-                    }
-                }
-            )
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported chart type: {chart_type}")
-        
-        return chart_data
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate chart data: {str(e)}")
+    chart_data = _CHART_TEMPLATES.get(chart_type)
+    if chart_data is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported chart type: {chart_type}")
+    
+    return chart_data
 
 
-@router.post("/configure")
+@router.post("/configure", response_model=ConfigureResponse)
 async def configure_dashboard(config: DashboardConfig):
     """
     Configure the dashboard settings.
@@ -372,20 +419,20 @@ async def configure_dashboard(config: DashboardConfig):
         manager = get_dashboard_manager()
         
         # Update configuration
-        viz_config = VisualizationConfig(**config.dict())
+        viz_config = VisualizationConfig(**config.model_dump())
         manager.config = viz_config
         
         return {
             "success": True,
             "message": "Dashboard configuration updated",
-            "config": config.dict()
+            "config": config
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to configure dashboard: {str(e)}")
 
 
-@router.get("/status")
+@router.get("/status", response_model=DashboardStatusResponse)
 async def get_dashboard_status():
     """
     Get the current status of the dashboard.
@@ -396,7 +443,7 @@ async def get_dashboard_status():
         return {
             "running": manager._running,
             "active_connections": len(manager.active_connections),
-            "config": manager.config.dict(),
+            "config": manager.config,
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -404,7 +451,7 @@ async def get_dashboard_status():
         raise HTTPException(status_code=500, detail=f"Failed to get dashboard status: {str(e)}")
 
 
-@router.get("/health")
+@router.get("/health", response_model=HealthResponse, response_model_exclude_none=True)
 async def health_check():
     """Health check for visualization service"""
     try:
@@ -1,12 +1,18 @@
 """Pattern analysis engine - Core AI intelligence for LipService."""
 
 from src.engine.anomaly_detector import Anomaly, AnomalyDetector
-from src.engine.pattern_analyzer import LogEntry, PatternAnalysis, PatternAnalyzer, PatternCluster
-from src.engine.signature import compute_signature, compute_signature_with_context, extract_error_type
+from src.engine.pattern_analyzer import LogBatch, LogEntry, PatternAnalysis, PatternAnalyzer, PatternCluster
+from src.engine.signature import (
+    compute_signature,
+    compute_signature_with_context,
+    compute_signatures,
+    extract_error_type,
+)
 
 __all__ = [
     # Signature generation
     "compute_signature",
+    "compute_signatures",
     "compute_signature_with_context",
     "extract_error_type",
     # Pattern analysis
@@ -14,6 +20,7 @@ __all__ = [
     "PatternAnalysis",
     "PatternCluster",
     "LogEntry",
+    "LogBatch",
     # Anomaly detection
     "AnomalyDetector",
     "Anomaly",
@@ -1,8 +1,13 @@
+import heapq
+from collections import Counter
 from dataclasses import dataclass
 from datetime import datetime
+from operator import attrgetter
 
 from src.engine.anomaly_detector import Anomaly, AnomalyDetector
-from src.engine.pattern_analyzer import LogEntry, PatternAnalysis, PatternAnalyzer
+from src.engine.pattern_analyzer import LogBatch, LogEntry, PatternAnalysis, PatternAnalyzer
+
+_ERROR_SEVERITIES = frozenset({"ERROR", "CRITICAL"})
 
 
 @dataclass
@@ -26,12 +31,12 @@ class LogAnalyzer:
         self.pattern_analyzer = PatternAnalyzer()
         self.anomaly_detector = AnomalyDetector()
 
-    def analyze(self, logs: list[LogEntry], known_signatures: set[str] | None = None) -> AnalysisResult:
+    def analyze(self, logs: list[LogEntry] | LogBatch, known_signatures: set[str] | None = None) -> AnalysisResult:
         """
         Perform complete analysis on logs.
 
         Args:
-            logs: List of log entries to analyze
+            logs: Log entries to analyze, as a list or an already columnar batch
             known_signatures: Previously seen pattern signatures (for new pattern detection)
 
         Returns:
@@ -42,57 +47,57 @@ class LogAnalyzer:
                 pattern_analysis=PatternAnalysis([], 0, 0, 0), anomalies=[], summary=self._empty_summary()
             )
 
-        pattern_analysis = self.pattern_analyzer.analyze(logs)
+        batch = logs if isinstance(logs, LogBatch) else LogBatch.from_entries(logs)
+
+        pattern_analysis = self.pattern_analyzer.analyze(batch)
 
-        anomalies = self._detect_anomalies(pattern_analysis, logs, known_signatures or set())
+        anomalies = self._detect_anomalies(pattern_analysis, batch, known_signatures or set(), datetime.now())
 
-        summary = self._generate_summary(pattern_analysis, anomalies, logs)
+        summary = self._generate_summary(pattern_analysis, anomalies, batch)
 
         return AnalysisResult(pattern_analysis=pattern_analysis, anomalies=anomalies, summary=summary)
 
     def _detect_anomalies(
-        self, pattern_analysis: PatternAnalysis, logs: list[LogEntry], known_signatures: set[str]
+        self, pattern_analysis: PatternAnalysis, batch: LogBatch, known_signatures: set[str], now: datetime
     ) -> list[Anomaly]:
-        """Detect all types of anomalies."""
+        """Detect all types of anomalies, stamping them all with the same detection time."""
         anomalies = []
 
-        new_pattern_anomalies = self._detect_new_patterns(pattern_analysis, known_signatures)
+        new_pattern_anomalies = self._detect_new_patterns(pattern_analysis, known_signatures, now)
         anomalies.extend(new_pattern_anomalies)
 
-        error_anomalies = self._detect_error_surges(logs)
+        error_anomalies = self._detect_error_surges(batch, now)
         anomalies.extend(error_anomalies)
 
         return anomalies
 
-    def _detect_new_patterns(self, pattern_analysis: PatternAnalysis, known_signatures: set[str]) -> list[Anomaly]:
+    def _detect_new_patterns(
+        self, pattern_analysis: PatternAnalysis, known_signatures: set[str], now: datetime
+    ) -> list[Anomaly]:
         """Detect new patterns that weren't seen before."""
-        anomalies = []
-
-        for cluster in pattern_analysis.clusters:
-            if self.anomaly_detector.is_new_pattern(cluster.signature, known_signatures):
-                anomalies.append(
-                    Anomaly(
-                        pattern_signature=cluster.signature,
-                        anomaly_type="new_pattern",
-                        severity="medium",
-                        current_value=float(cluster.total_count),
-                        baseline_value=0.0,
-                        confidence=1.0,
-                        detected_at=datetime.now(),
-                        message=f"New pattern detected: {cluster.representative_message[:100]}",
-                    )
-                )
-
-        return anomalies
+        return [
+            Anomaly(
+                pattern_signature=cluster.signature,
+                anomaly_type="new_pattern",
+                severity="medium",
+                current_value=float(cluster.total_count),
+                baseline_value=0.0,
+                confidence=1.0,
+                detected_at=now,
+                message=f"New pattern detected: {cluster.representative_message[:100]}",
+            )
+            for cluster in pattern_analysis.clusters
+            if cluster.signature not in known_signatures
+        ]
 
-    def _detect_error_surges(self, logs: list[LogEntry]) -> list[Anomaly]:
+    def _detect_error_surges(self, batch: LogBatch, now: datetime) -> list[Anomaly]:
         """Detect surges in error-level logs."""
-        error_logs = [log for log in logs if log.severity in ("ERROR", "CRITICAL")]
+        error_count = sum(1 for severity in batch.severities if severity in _ERROR_SEVERITIES)
 
-        if not error_logs:
+        if not error_count:
             return []
 
-        error_rate = len(error_logs) / len(logs)
+        error_rate = error_count / len(batch)
 
         if error_rate > 0.1:
             return [
@@ -103,7 +108,7 @@ class LogAnalyzer:
                     current_value=error_rate,
                     baseline_value=0.05,
                     confidence=min(error_rate * 5, 1.0),
-                    detected_at=datetime.now(),
+                    detected_at=now,
                     message=f"High error rate: {error_rate:.1%} of logs are errors",
                 )
             ]
@@ -111,28 +116,26 @@ class LogAnalyzer:
         return []
 
     def _generate_summary(
-        self, pattern_analysis: PatternAnalysis, anomalies: list[Anomaly], logs: list[LogEntry]
+        self, pattern_analysis: PatternAnalysis, anomalies: list[Anomaly], batch: LogBatch
     ) -> dict:
         """Generate summary statistics."""
-        severity_counts = {}
-        for log in logs:
-            severity_counts[log.severity] = severity_counts.get(log.severity, 0) + 1
+        severity_counts = dict(Counter(batch.severities))
 
         return {
-            "total_logs": len(logs),
+            "total_logs": len(batch),
             "unique_patterns": pattern_analysis.total_unique_patterns,
             "clusters_found": len(pattern_analysis.clusters),
             "anomalies_detected": len(anomalies),
-            "high_severity_anomalies": len([a for a in anomalies if a.severity == "high"]),
+            "high_severity_anomalies": sum(1 for a in anomalies if a.severity == "high"),
             "severity_distribution": severity_counts,
-            "error_rate": severity_counts.get("ERROR", 0) / len(logs) if logs else 0.0,
+            "error_rate": sum(severity_counts.get(s, 0) for s in _ERROR_SEVERITIES) / len(batch) if batch else 0.0,
             "top_patterns": [
                 {
                     "message": c.representative_message,
                     "count": c.total_count,
                     "signature": c.signature,
                 }
-                for c in sorted(pattern_analysis.clusters, key=lambda x: x.total_count, reverse=True)[:5]
+                for c in heapq.nlargest(5, pattern_analysis.clusters, key=attrgetter("total_count"))
             ],
         }
 
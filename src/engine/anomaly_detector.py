@@ -1,4 +1,5 @@
-from collections import deque
+import math
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
@@ -39,7 +40,14 @@ class AnomalyDetector:
         """
         self.window_size = window_size
         self.z_threshold = z_threshold
-        self.rate_window: deque[float] = deque(maxlen=window_size)
+        # Ring buffer of the last window_size log timestamps; unused slots are -inf
+        self._rate_buffer = np.full(window_size, -np.inf, dtype=np.float64)
+        self._rate_head = 0
+        self._rate_count = 0
+        # Running sample statistics (Welford) for detect_with_running_zscore
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
 
     def detect_rate_anomaly(self, current_rate: float, baseline_rate: float) -> Anomaly | None:
         """
@@ -99,9 +107,44 @@ class AnomalyDetector:
         if len(values) < 2:
             return None
 
-        mean = np.mean(values)
-        std = np.std(values)
+        arr = np.asarray(values, dtype=np.float64)
+        return self._zscore_anomaly(current_value, float(arr.mean()), float(arr.std()))
 
+    def add_sample(self, value: float) -> None:
+        """
+        Add a value to the running statistics used by detect_with_running_zscore.
+
+        Uses Welford's online algorithm, so mean and variance are updated in
+        O(1) without keeping the samples.
+
+        Args:
+            value: New observed value
+        """
+        self._n += 1
+        delta = value - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (value - self._mean)
+
+    def detect_with_running_zscore(self, current_value: float) -> Anomaly | None:
+        """
+        Detect anomaly using Z-score against the samples seen by add_sample.
+
+        Equivalent to detect_with_zscore over every added sample, but O(1)
+        per call, for callers scoring a stream one value at a time.
+
+        Args:
+            current_value: Current value to check
+
+        Returns:
+            Anomaly if detected, else None
+        """
+        if self._n < 2:
+            return None
+
+        return self._zscore_anomaly(current_value, self._mean, math.sqrt(self._m2 / self._n))
+
+    def _zscore_anomaly(self, current_value: float, mean: float, std: float) -> Anomaly | None:
+        """Build a Z-score anomaly for current_value, or None if within threshold."""
         if std == 0:
             return None
 
@@ -196,26 +239,34 @@ class AnomalyDetector:
         Args:
             timestamp: Unix timestamp of new log
         """
-        self.rate_window.append(timestamp)
+        self._rate_buffer[self._rate_head] = timestamp
+        self._rate_head = (self._rate_head + 1) % self.window_size
+        self._rate_count = min(self._rate_count + 1, self.window_size)
+
+    @property
+    def rate_window(self) -> np.ndarray:
+        """Timestamps currently in the sliding window, oldest first."""
+        if self._rate_count < self.window_size:
+            return self._rate_buffer[: self._rate_count].copy()
+        return np.roll(self._rate_buffer, -self._rate_head)
 
     def get_current_rate(self, window_seconds: int = 10) -> float:
         """
         Calculate current logs per second in recent window.
 
+        Counts the buffered timestamps inside the window in one vectorized
+        comparison over the ring buffer.
+
         Args:
             window_seconds: Time window to calculate rate
 
         Returns:
             Logs per second in recent window
         """
-        if len(self.rate_window) < 2:
-            return 0.0
-
-        now = datetime.now().timestamp()
-        recent_logs = [t for t in self.rate_window if now - t < window_seconds]
+        recent_logs = np.count_nonzero(self._rate_buffer > time.time() - window_seconds)
 
-        if len(recent_logs) < 2:
+        if recent_logs < 2:
             return 0.0
 
-        return len(recent_logs) / window_seconds
+        return recent_logs / window_seconds
 
@@ -1,15 +1,53 @@
-import json
+import re
+import time
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from functools import lru_cache
 
+import httpx
+import orjson
 import structlog
-from anthropic import Anthropic
-from openai import OpenAI
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
 
 logger = structlog.get_logger(__name__)
 
+# First fenced block in a chat reply, with or without a json language tag
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
 
-@dataclass
+# How often to check on a submitted provider batch job
+BATCH_POLL_INTERVAL_SECONDS = 30.0
+
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 32
+HTTP_TIMEOUT_SECONDS = 60.0
+
+# SDK-level retries (exponential backoff with jitter on 429, 5xx and connection errors)
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_REQUESTS_PER_MINUTE = 500
+
+_OPENAI_SYSTEM_PROMPT = """You are an expert in log management and observability.
+Your task is to generate intelligent sampling policies that balance cost, observability, and debugging needs.
+
+CRITICAL RULES:
+1. ALWAYS keep ERROR and CRITICAL logs at 100% (1.0)
+2. Sample repetitive INFO/DEBUG logs aggressively (0.01-0.1)
+3. Keep first occurrences of new patterns at 100%
+4. Increase sampling during anomalies (anomaly_boost: 2.0-5.0)
+5. Balance cost constraints with observability needs"""
+
+_ANTHROPIC_SYSTEM_PROMPT = """You are an expert in log management and observability.
+Generate intelligent sampling policies that balance cost and observability.
+
+CRITICAL RULES:
+1. ALWAYS keep ERROR and CRITICAL logs at 100% (1.0)
+2. Sample repetitive INFO/DEBUG logs aggressively
+3. Increase sampling during anomalies
+4. Return valid JSON only"""
+
+
+@dataclass(slots=True)
 class PolicyResponse:
     """Response from LLM policy generation."""
 
@@ -21,6 +59,85 @@ class PolicyResponse:
     model: str
 
 
+def _policy_from_json(content: str | bytes, model: str) -> PolicyResponse:
+    """Parse an LLM JSON reply into a policy, forcing ERROR and CRITICAL to 1.0."""
+    policy_data = orjson.loads(content)
+
+    policy_data["severity_rates"]["ERROR"] = 1.0
+    policy_data["severity_rates"]["CRITICAL"] = 1.0
+
+    return PolicyResponse(
+        global_rate=policy_data.get("global_rate", 1.0),
+        severity_rates=policy_data.get("severity_rates", {}),
+        pattern_rates=policy_data.get("pattern_rates", {}),
+        anomaly_boost=policy_data.get("anomaly_boost", 2.0),
+        reasoning=policy_data.get("reasoning", ""),
+        model=model,
+    )
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket allowing max_rate acquisitions per time_period seconds.
+
+    Used as ``async with limiter:`` around provider calls so gathered
+    requests throttle themselves instead of running into 429s.
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 60.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                refill = (now - self._updated) * self.max_rate / self.time_period
+                self._tokens = min(self.max_rate, self._tokens + refill)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) * self.time_period / self.max_rate)
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+@lru_cache(maxsize=1)
+def _http_client() -> httpx.AsyncClient:
+    """
+    Connection pool shared by every provider client.
+
+    Keeping idle connections alive across providers and requests avoids
+    paying a new TLS handshake on each LLM call.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        timeout=HTTP_TIMEOUT_SECONDS,
+    )
+
+
+async def close_http_client() -> None:
+    """Close the shared LLM connection pool (called on app shutdown)."""
+    if _http_client.cache_info().currsize:
+        await _http_client().aclose()
+        _http_client.cache_clear()
+
+
+def _extract_json(content: str) -> str:
+    """Return the fenced JSON block of a chat reply, or the reply itself."""
+    fenced = _JSON_FENCE_RE.search(content)
+    return fenced.group(1) if fenced else content
+
+
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
@@ -34,116 +151,184 @@ class LLMProvider(ABC):
         """Get LLM model identifier."""
         pass
 
+    async def generate_policies_batch(self, prompts: list[str]) -> list[PolicyResponse | Exception]:
+        """
+        Generate policies for many prompts as one offline job.
+
+        Providers with a batch API override this to trade latency for cost;
+        the default calls generate_policy for each prompt.
+
+        Returns:
+            One entry per prompt, in order: the policy, or the error for that prompt
+        """
+        results: list[PolicyResponse | Exception] = []
+        for prompt in prompts:
+            try:
+                results.append(await self.generate_policy(prompt))
+            except Exception as e:
+                results.append(e)
+        return results
+
 
 class OpenAIProvider(LLMProvider):
     """OpenAI provider for policy generation."""
 
-    def __init__(self, api_key: str, model: str = "gpt-4o"):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4o",
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+    ):
+        self.client = AsyncOpenAI(api_key=api_key, http_client=_http_client(), max_retries=max_retries)
+        self._limiter = AsyncRateLimiter(requests_per_minute)
         self.model = model
 
+    def _request_body(self, prompt: str) -> dict:
+        """Chat completion parameters for a policy prompt."""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": _OPENAI_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0.3,
+        }
+
     async def generate_policy(self, prompt: str) -> PolicyResponse:
         """Generate policy using OpenAI."""
         logger.info("Generating policy with OpenAI", model=self.model)
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert in log management and observability.
-Your task is to generate intelligent sampling policies that balance cost, observability, and debugging needs.
-
-CRITICAL RULES:
-1. ALWAYS keep ERROR and CRITICAL logs at 100% (1.0)
-2. Sample repetitive INFO/DEBUG logs aggressively (0.01-0.1)
-3. Keep first occurrences of new patterns at 100%
-4. Increase sampling during anomalies (anomaly_boost: 2.0-5.0)
-5. Balance cost constraints with observability needs""",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3,
-            )
+            async with self._limiter:
+                response = await self.client.chat.completions.create(**self._request_body(prompt))
 
-            content = response.choices[0].message.content
-            policy_data = json.loads(content)
-
-            policy_data["severity_rates"]["ERROR"] = 1.0
-            policy_data["severity_rates"]["CRITICAL"] = 1.0
+            policy = _policy_from_json(response.choices[0].message.content, self.model)
 
             logger.info("Policy generated successfully", model=self.model)
 
-            return PolicyResponse(
-                global_rate=policy_data.get("global_rate", 1.0),
-                severity_rates=policy_data.get("severity_rates", {}),
-                pattern_rates=policy_data.get("pattern_rates", {}),
-                anomaly_boost=policy_data.get("anomaly_boost", 2.0),
-                reasoning=policy_data.get("reasoning", ""),
-                model=self.model,
-            )
+            return policy
 
         except Exception as e:
             logger.error("OpenAI policy generation failed", error=str(e))
             raise
 
+    async def generate_policies_batch(self, prompts: list[str]) -> list[PolicyResponse | Exception]:
+        """Generate policies through the OpenAI Batch API (24h window, discounted)."""
+        lines = [
+            orjson.dumps(
+                {"custom_id": str(i), "method": "POST", "url": "/v1/chat/completions", "body": self._request_body(p)}
+            )
+            for i, p in enumerate(prompts)
+        ]
+        batch_file = await self.client.files.create(file=("policies.jsonl", b"\n".join(lines)), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
+
+        logger.info("Submitted OpenAI policy batch", model=self.model, batch_id=batch.id, prompts=len(prompts))
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(BATCH_POLL_INTERVAL_SECONDS)
+            batch = await self.client.batches.retrieve(batch.id)
+
+        results: list[PolicyResponse | Exception] = [
+            RuntimeError(f"OpenAI batch {batch.id} returned no result ({batch.status})") for _ in prompts
+        ]
+        if not batch.output_file_id:
+            return results
+
+        output = await self.client.files.content(batch.output_file_id)
+        for line in output.content.splitlines():
+            entry = orjson.loads(line)
+            index = int(entry["custom_id"])
+            response = entry.get("response") or {}
+            if response.get("status_code") != 200:
+                results[index] = RuntimeError(f"OpenAI batch request failed: {entry.get('error') or response}")
+                continue
+            try:
+                results[index] = _policy_from_json(response["body"]["choices"][0]["message"]["content"], self.model)
+            except Exception as e:
+                results[index] = e
+
+        return results
+
+    def get_model_name(self) -> str:
+        return self.model
+
 
 class AnthropicProvider(LLMProvider):
     """Anthropic (Claude) provider for policy generation."""
 
-    def __init__(self, api_key: str, model: str = "claude-3-5-sonnet-20241022"):
-        self.client = Anthropic(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-3-5-sonnet-20241022",
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+    ):
+        self.client = AsyncAnthropic(api_key=api_key, http_client=_http_client(), max_retries=max_retries)
+        self._limiter = AsyncRateLimiter(requests_per_minute)
         self.model = model
 
+    def _request_params(self, prompt: str) -> dict:
+        """Messages API parameters for a policy prompt."""
+        return {
+            "model": self.model,
+            "max_tokens": 2000,
+            "system": _ANTHROPIC_SYSTEM_PROMPT,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+
     async def generate_policy(self, prompt: str) -> PolicyResponse:
         """Generate policy using Anthropic Claude."""
         logger.info("Generating policy with Anthropic", model=self.model)
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=2000,
-                system="""You are an expert in log management and observability.
-Generate intelligent sampling policies that balance cost and observability.
+            async with self._limiter:
+                response = await self.client.messages.create(**self._request_params(prompt))
 
-CRITICAL RULES:
-1. ALWAYS keep ERROR and CRITICAL logs at 100% (1.0)
-2. Sample repetitive INFO/DEBUG logs aggressively
-3. Increase sampling during anomalies
-4. Return valid JSON only""",
-                messages=[{"role": "user", "content": prompt}],
-            )
-
-            content = response.content[0].text
-
-            content_json = content
-            if "```json" in content:
-                content_json = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content_json = content.split("```")[1].split("```")[0].strip()
-
-            policy_data = json.loads(content_json)
-
-            policy_data["severity_rates"]["ERROR"] = 1.0
-            policy_data["severity_rates"]["CRITICAL"] = 1.0
+            policy = _policy_from_json(_extract_json(response.content[0].text), self.model)
 
             logger.info("Policy generated successfully", model=self.model)
 
-            return PolicyResponse(
-                global_rate=policy_data.get("global_rate", 1.0),
-                severity_rates=policy_data.get("severity_rates", {}),
-                pattern_rates=policy_data.get("pattern_rates", {}),
-                anomaly_boost=policy_data.get("anomaly_boost", 2.0),
-                reasoning=policy_data.get("reasoning", ""),
-                model=self.model,
-            )
+            return policy
 
         except Exception as e:
             logger.error("Anthropic policy generation failed", error=str(e))
             raise
 
+    async def generate_policies_batch(self, prompts: list[str]) -> list[PolicyResponse | Exception]:
+        """Generate policies through the Anthropic Message Batches API."""
+        batch = await self.client.messages.batches.create(
+            requests=[{"custom_id": str(i), "params": self._request_params(p)} for i, p in enumerate(prompts)]
+        )
+
+        logger.info("Submitted Anthropic policy batch", model=self.model, batch_id=batch.id, prompts=len(prompts))
+
+        while batch.processing_status != "ended":
+            await asyncio.sleep(BATCH_POLL_INTERVAL_SECONDS)
+            batch = await self.client.messages.batches.retrieve(batch.id)
+
+        results: list[PolicyResponse | Exception] = [
+            RuntimeError(f"Anthropic batch {batch.id} returned no result") for _ in prompts
+        ]
+        async for entry in await self.client.messages.batches.results(batch.id):
+            index = int(entry.custom_id)
+            if entry.result.type != "succeeded":
+                results[index] = RuntimeError(f"Anthropic batch request {entry.result.type}")
+                continue
+            try:
+                results[index] = _policy_from_json(_extract_json(entry.result.message.content[0].text), self.model)
+            except Exception as e:
+                results[index] = e
+
+        return results
+
+    def get_model_name(self) -> str:
+        return self.model
+
 
 class RuleBasedProvider(LLMProvider):
     """Fallback rule-based provider (no LLM required)."""
@@ -172,4 +357,3 @@ class RuleBasedProvider(LLMProvider):
 
     def get_model_name(self) -> str:
         return "rule-based"
-
@@ -4,12 +4,16 @@ from datetime import datetime
 
 import numpy as np
 from sklearn.cluster import DBSCAN
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 
-from src.engine.signature import compute_signature
+from src.engine.signature import compute_signatures
 
+HASHING_FEATURES = 1024
+# Below this many distinct signatures, token overlap is cheaper than TF-IDF + DBSCAN
+SMALL_PATTERN_LIMIT = 50
 
-@dataclass
+
+@dataclass(slots=True)
 class LogEntry:
     """Represents a single log entry for analysis."""
 
@@ -19,7 +23,42 @@ class LogEntry:
     service_name: str
 
 
-@dataclass
+@dataclass(slots=True)
+class LogBatch:
+    """
+    Column-oriented batch of log entries.
+
+    Analysis only reads messages, severities and timestamps, so keeping them
+    in parallel lists avoids touching a LogEntry object per field access.
+    """
+
+    messages: list[str]
+    severities: list[str]
+    timestamps: list[datetime]
+    service_names: list[str]
+
+    @classmethod
+    def from_entries(cls, logs: list[LogEntry]) -> "LogBatch":
+        """Split log entries into columns."""
+        return cls(
+            messages=[log.message for log in logs],
+            severities=[log.severity for log in logs],
+            timestamps=[log.timestamp for log in logs],
+            service_names=[log.service_name for log in logs],
+        )
+
+    def to_entries(self) -> list[LogEntry]:
+        """Rebuild per-row log entries for callers that need them."""
+        return [
+            LogEntry(message=m, severity=s, timestamp=t, service_name=n)
+            for m, s, t, n in zip(self.messages, self.severities, self.timestamps, self.service_names)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+
+@dataclass(slots=True)
 class PatternCluster:
     """Represents a cluster of similar log patterns."""
 
@@ -33,7 +72,7 @@ class PatternCluster:
     last_seen: datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class PatternAnalysis:
     """Results of pattern analysis."""
 
@@ -62,14 +101,19 @@ class PatternAnalyzer:
         """
         self.eps = eps
         self.min_samples = min_samples
-        self.vectorizer = TfidfVectorizer(max_features=100, lowercase=True, stop_words="english")
+        # Hashing is stateless, so there is no vocabulary to rebuild on every
+        # analyze call; only the IDF weights are refit per batch.
+        self.vectorizer = HashingVectorizer(
+            n_features=HASHING_FEATURES, norm=None, alternate_sign=False, lowercase=True, stop_words="english"
+        )
+        self.tfidf = TfidfTransformer()
 
-    def analyze(self, logs: list[LogEntry]) -> PatternAnalysis:
+    def analyze(self, logs: list[LogEntry] | LogBatch) -> PatternAnalysis:
         """
         Analyze logs to identify patterns and clusters.
         
         Args:
-            logs: List of log entries to analyze
+            logs: Log entries to analyze, as a list or an already columnar batch
             
         Returns:
             PatternAnalysis with clusters and statistics
@@ -77,12 +121,13 @@ class PatternAnalyzer:
         if not logs:
             return PatternAnalysis(clusters=[], noise_count=0, total_unique_patterns=0, total_logs=0)
 
-        pattern_groups = self._group_by_signature(logs)
+        batch = logs if isinstance(logs, LogBatch) else LogBatch.from_entries(logs)
+        pattern_groups = self._group_by_signature(batch)
 
         if not pattern_groups:
             return PatternAnalysis(clusters=[], noise_count=0, total_unique_patterns=0, total_logs=len(logs))
 
-        clusters = self._cluster_patterns(pattern_groups)
+        clusters = self._cluster_patterns(pattern_groups, batch)
 
         return PatternAnalysis(
             clusters=clusters,
@@ -91,66 +136,124 @@ class PatternAnalyzer:
             total_logs=len(logs),
         )
 
-    def _group_by_signature(self, logs: list[LogEntry]) -> dict:
-        """Group logs by signature and aggregate metadata."""
-        groups = defaultdict(lambda: {"logs": [], "severity_dist": defaultdict(int)})
-
-        for log in logs:
-            sig = compute_signature(log.message)
-            groups[sig]["logs"].append(log)
-            groups[sig]["severity_dist"][log.severity] += 1
+    def _group_by_signature(self, batch: LogBatch) -> dict:
+        """Group log row indices by signature and aggregate metadata."""
+        groups = {}
+
+        signatures = compute_signatures(batch.messages)
+
+        for i, (sig, severity, timestamp) in enumerate(zip(signatures, batch.severities, batch.timestamps)):
+            group = groups.get(sig)
+            if group is None:
+                group = groups[sig] = {
+                    "indices": [],
+                    "severity_dist": defaultdict(int),
+                    "first": timestamp,
+                    "last": timestamp,
+                }
+            elif timestamp < group["first"]:
+                group["first"] = timestamp
+            elif timestamp > group["last"]:
+                group["last"] = timestamp
+
+            group["indices"].append(i)
+            group["severity_dist"][severity] += 1
 
         return groups
 
-    def _cluster_patterns(self, pattern_groups: dict) -> list[PatternCluster]:
+    def _cluster_patterns(self, pattern_groups: dict, batch: LogBatch) -> list[PatternCluster]:
         """Cluster patterns using DBSCAN."""
         if len(pattern_groups) < 2:
-            return self._create_single_cluster(pattern_groups)
+            return self._create_single_cluster(pattern_groups, batch)
 
         signatures = list(pattern_groups.keys())
-        messages = [pattern_groups[sig]["logs"][0].message for sig in signatures]
-
-        try:
-            vectors = self.vectorizer.fit_transform(messages)
-            clustering = DBSCAN(eps=self.eps, min_samples=self.min_samples, metric="cosine")
-            labels = clustering.fit_predict(vectors.toarray())
-        except Exception:
-            return self._create_single_cluster(pattern_groups)
+        messages = [batch.messages[pattern_groups[sig]["indices"][0]] for sig in signatures]
+
+        if len(signatures) < SMALL_PATTERN_LIMIT:
+            labels = self._label_by_token_overlap(messages)
+        else:
+            try:
+                vectors = self.tfidf.fit_transform(self.vectorizer.transform(messages))
+                # Cosine neighbours are computed brute-force directly on the sparse
+                # TF-IDF matrix; densifying it first only costs memory.
+                clustering = DBSCAN(eps=self.eps, min_samples=self.min_samples, metric="cosine", algorithm="brute")
+                labels = clustering.fit_predict(vectors)
+            except Exception:
+                return self._create_single_cluster(pattern_groups, batch)
 
         clusters = []
         for label in set(labels):
             cluster_signatures = [sig for sig, lbl in zip(signatures, labels) if lbl == label]
-            cluster = self._build_cluster(label, cluster_signatures, pattern_groups)
+            cluster = self._build_cluster(label, cluster_signatures, pattern_groups, batch)
             clusters.append(cluster)
 
         return sorted(clusters, key=lambda c: c.total_count, reverse=True)
 
-    def _create_single_cluster(self, pattern_groups: dict) -> list[PatternCluster]:
+    def _label_by_token_overlap(self, messages: list[str]) -> list[int]:
+        """
+        Label a small set of messages without sklearn.
+
+        Messages whose token sets are within eps Jaccard distance are merged
+        (union-find); groups smaller than min_samples are labelled -1 as noise,
+        matching DBSCAN's output convention.
+        """
+        tokens = [set(msg.lower().split()) for msg in messages]
+        parent = list(range(len(messages)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i in range(len(tokens)):
+            for j in range(i + 1, len(tokens)):
+                union = len(tokens[i] | tokens[j])
+                if union and 1 - len(tokens[i] & tokens[j]) / union <= self.eps:
+                    parent[find(j)] = find(i)
+
+        roots = [find(i) for i in range(len(messages))]
+        sizes = defaultdict(int)
+        for root in roots:
+            sizes[root] += 1
+
+        label_of: dict[int, int] = {}
+        labels = []
+        for root in roots:
+            if sizes[root] < self.min_samples:
+                labels.append(-1)
+            else:
+                labels.append(label_of.setdefault(root, len(label_of)))
+        return labels
+
+    def _create_single_cluster(self, pattern_groups: dict, batch: LogBatch) -> list[PatternCluster]:
         """Create single cluster when clustering not possible."""
         signatures = list(pattern_groups.keys())
-        return [self._build_cluster(0, signatures, pattern_groups)]
+        return [self._build_cluster(0, signatures, pattern_groups, batch)]
 
-    def _build_cluster(self, cluster_id: int, signatures: list[str], pattern_groups: dict) -> PatternCluster:
+    def _build_cluster(
+        self, cluster_id: int, signatures: list[str], pattern_groups: dict, batch: LogBatch
+    ) -> PatternCluster:
         """Build cluster metadata from signatures."""
-        all_logs = []
+        total_count = 0
         severity_dist = defaultdict(int)
 
         for sig in signatures:
-            all_logs.extend(pattern_groups[sig]["logs"])
+            total_count += len(pattern_groups[sig]["indices"])
             for severity, count in pattern_groups[sig]["severity_dist"].items():
                 severity_dist[severity] += count
 
-        representative = max(signatures, key=lambda s: len(pattern_groups[s]["logs"]))
-        rep_message = pattern_groups[representative]["logs"][0].message
+        representative = max(signatures, key=lambda s: len(pattern_groups[s]["indices"]))
+        rep_message = batch.messages[pattern_groups[representative]["indices"][0]]
 
         return PatternCluster(
             cluster_id=cluster_id,
             size=len(signatures),
-            total_count=len(all_logs),
+            total_count=total_count,
             representative_message=rep_message,
             signature=representative,
             severity_distribution=dict(severity_dist),
-            first_seen=min(log.timestamp for log in all_logs),
-            last_seen=max(log.timestamp for log in all_logs),
+            first_seen=min(pattern_groups[sig]["first"] for sig in signatures),
+            last_seen=max(pattern_groups[sig]["last"] for sig in signatures),
         )
 
@@ -0,0 +1,113 @@
+import json
+import hashlib
+import threading
+from dataclasses import asdict
+from typing import Protocol
+
+import structlog
+from cachetools import TTLCache
+
+from src.engine.analyzer import AnalysisResult
+from src.engine.llm_provider import PolicyResponse
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_TTL_SECONDS = 3600
+
+
+class CacheBackend(Protocol):
+    """Storage for serialized policy responses."""
+
+    async def get(self, key: str) -> str | None: ...
+
+    async def set(self, key: str, value: str, ttl: int) -> None: ...
+
+
+class InMemoryBackend:
+    """Process-local TTL cache backend."""
+
+    def __init__(self, maxsize: int = 1024, ttl: int = DEFAULT_TTL_SECONDS):
+        self._cache: TTLCache[str, str] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> str | None:
+        with self._lock:
+            return self._cache.get(key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        # TTLCache applies its own ttl; per-entry ttl is only honoured by Redis.
+        with self._lock:
+            self._cache[key] = value
+
+
+class RedisBackend:
+    """Redis cache backend, shared across API workers."""
+
+    def __init__(self, url: str, prefix: str = "lipservice:policy:"):
+        from redis.asyncio import Redis
+
+        self._client = Redis.from_url(url)
+        self._prefix = prefix
+
+    async def get(self, key: str) -> str | None:
+        value = await self._client.get(self._prefix + key)
+        return value.decode() if value is not None else None
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self._client.set(self._prefix + key, value, ex=ttl)
+
+
+class PolicyCache:
+    """
+    Exact-match cache for LLM-generated policies.
+
+    Keys are the sha256 of a canonical JSON dump of everything the LLM sees
+    (provider, service, cost target, analysis summary and anomalies), so an
+    identical analysis skips the LLM round-trip. Backend errors are logged and
+    treated as misses; the cache never fails policy generation.
+    """
+
+    def __init__(self, backend: CacheBackend | None = None, ttl: int = DEFAULT_TTL_SECONDS):
+        self.backend = backend or InMemoryBackend(ttl=ttl)
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(provider: str, service_name: str, analysis: AnalysisResult, cost_target: float | None) -> str:
+        """Build the cache key for a policy request."""
+        payload = {
+            "provider": provider,
+            "service_name": service_name,
+            "cost_target": cost_target,
+            "summary": analysis.summary,
+            # detected_at changes on every run and is not part of the prompt
+            "anomalies": [
+                {
+                    "pattern_signature": a.pattern_signature,
+                    "anomaly_type": a.anomaly_type,
+                    "severity": a.severity,
+                    "message": a.message,
+                }
+                for a in analysis.anomalies
+            ],
+        }
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    async def get(self, key: str) -> PolicyResponse | None:
+        """Return the cached policy for key, or None on a miss."""
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.warning("Policy cache read failed", error=str(e))
+            return None
+
+        if value is None:
+            return None
+        return PolicyResponse(**json.loads(value))
+
+    async def set(self, key: str, policy: PolicyResponse) -> None:
+        """Store a generated policy under key."""
+        try:
+            await self.backend.set(key, json.dumps(asdict(policy)), self.ttl)
+        except Exception as e:
+            logger.warning("Policy cache write failed", error=str(e))
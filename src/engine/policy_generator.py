@@ -1,10 +1,64 @@
+import asyncio
+import hashlib
+
 import structlog
+from cachetools import TTLCache
 
 from src.engine.analyzer import AnalysisResult
 from src.engine.llm_provider import LLMProvider, PolicyResponse
 
 logger = structlog.get_logger(__name__)
 
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_TTL_SECONDS = 3600
+
+_PROMPT_TEMPLATE = """
+Analyze these log patterns and generate an intelligent sampling policy.
+
+Service: {service_name}
+Total Logs Analyzed: {total_logs}
+Unique Patterns: {unique_patterns}
+Clusters Found: {clusters_found}
+Anomalies Detected: {anomalies_detected}
+Error Rate: {error_rate:.1%}
+{cost_section}
+
+Severity Distribution:
+{severity_dist}
+
+Top Patterns (by frequency):
+{clusters}
+
+Anomalies Detected:
+{anomalies}
+
+Generate a JSON sampling policy with this structure:
+{{
+  "global_rate": 0.0-1.0,
+  "severity_rates": {{
+    "DEBUG": 0.0-1.0,
+    "INFO": 0.0-1.0,
+    "WARNING": 0.0-1.0,
+    "ERROR": 1.0,
+    "CRITICAL": 1.0
+  }},
+  "pattern_rates": {{
+    "pattern_signature": 0.0-1.0
+  }},
+  "anomaly_boost": 1.0-10.0,
+  "reasoning": "Explain your policy decisions"
+}}
+
+Consider:
+1. Which patterns are noisy/repetitive vs valuable signals?
+2. What sampling rates achieve cost target while maintaining observability?
+3. Should any high-volume patterns be sampled more aggressively?
+4. How should we boost sampling during detected anomalies?
+
+REMEMBER: ERROR and CRITICAL must ALWAYS be 1.0 (100% sampling)
+"""
+
 
 class PolicyGenerator:
     """
@@ -12,10 +66,23 @@ class PolicyGenerator:
 
     Takes pattern analysis results and uses LLM to generate
     smart sampling policies that balance cost and observability.
+
+    Validated policies are cached in process by a hash of the prompt, so an
+    unchanged analysis for the same service skips the LLM round-trip until
+    the entry expires.
     """
 
-    def __init__(self, llm_provider: LLMProvider):
+    # Safety override applied to every policy, whatever the LLM returned
+    _FORCED_SEVERITY_RATES = {"ERROR": 1.0, "CRITICAL": 1.0}
+
+    def __init__(
+        self,
+        llm_provider: LLMProvider,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_ttl: int = DEFAULT_CACHE_TTL_SECONDS,
+    ):
         self.llm_provider = llm_provider
+        self._cache: TTLCache[str, PolicyResponse] = TTLCache(maxsize=cache_size, ttl=cache_ttl)
 
     async def generate_policy(
         self, service_name: str, analysis: AnalysisResult, cost_target: float | None = None
@@ -32,6 +99,12 @@ class PolicyGenerator:
             PolicyResponse with sampling rates and reasoning
         """
         prompt = self._build_prompt(service_name, analysis, cost_target)
+        key = self._cache_key(prompt)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            logger.info("Policy cache hit", service=service_name)
+            return cached
 
         logger.info(
             "Generating policy",
@@ -44,6 +117,7 @@ class PolicyGenerator:
             policy = await self.llm_provider.generate_policy(prompt)
 
             policy = self._validate_and_fix_policy(policy)
+            self._cache[key] = policy
 
             logger.info(
                 "Policy generated",
@@ -58,20 +132,68 @@ class PolicyGenerator:
             logger.error("Policy generation failed", service=service_name, error=str(e))
             raise
 
+    async def generate_policies(
+        self,
+        jobs: list[tuple[str, AnalysisResult, float | None]],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> list[PolicyResponse | BaseException]:
+        """
+        Generate policies for several services concurrently.
+
+        Prompts are built up front and cached policies are reused; the
+        remaining LLM calls run together, at most max_concurrency at a time to
+        stay within provider rate limits.
+
+        Args:
+            jobs: (service_name, analysis, cost_target) per service
+            max_concurrency: Maximum LLM calls in flight at once
+
+        Returns:
+            One entry per job, in order: the validated PolicyResponse, or the
+            exception raised for that service
+        """
+        prompts = [
+            self._build_prompt(service_name, analysis, cost_target) for service_name, analysis, cost_target in jobs
+        ]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def call(prompt: str) -> PolicyResponse:
+            cached = self._cache.get(self._cache_key(prompt))
+            if cached is not None:
+                return cached
+            async with semaphore:
+                policy = await self.llm_provider.generate_policy(prompt)
+            policy = self._validate_and_fix_policy(policy)
+            self._cache[self._cache_key(prompt)] = policy
+            return policy
+
+        logger.info("Generating policies", services=len(jobs), max_concurrency=max_concurrency)
+
+        results = await asyncio.gather(*[call(prompt) for prompt in prompts], return_exceptions=True)
+
+        for (service_name, _, _), result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                logger.error("Policy generation failed", service=service_name, error=str(result))
+
+        return list(results)
+
+    @staticmethod
+    def _cache_key(prompt: str) -> str:
+        """Hash a prompt into a policy cache key."""
+        return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+
     def _build_prompt(self, service_name: str, analysis: AnalysisResult, cost_target: float | None) -> str:
         """Build prompt for LLM policy generation."""
         summary = analysis.summary
 
         clusters_info = "\n".join(
-            [
-                f"- Pattern {i+1}: '{pattern['message'][:80]}...' "
-                f"(count: {pattern['count']}, signature: {pattern['signature'][:8]}...)"
-                for i, pattern in enumerate(summary["top_patterns"][:10])
-            ]
+            f"- Pattern {i+1}: '{pattern['message'][:80]}...' "
+            f"(count: {pattern['count']}, signature: {pattern['signature'][:8]}...)"
+            for i, pattern in enumerate(summary["top_patterns"][:10])
         )
 
         anomalies_info = "\n".join(
-            [f"- [{a.severity.upper()}] {a.anomaly_type}: {a.message}" for a in analysis.anomalies[:5]]
+            f"- [{a.severity.upper()}] {a.anomaly_type}: {a.message}" for a in analysis.anomalies[:5]
         )
 
         cost_section = (
@@ -80,59 +202,27 @@ class PolicyGenerator:
             else "\nCost Target: No specific target, optimize for value"
         )
 
-        prompt = f"""
-Analyze these log patterns and generate an intelligent sampling policy.
-
-Service: {service_name}
-Total Logs Analyzed: {summary['total_logs']}
-Unique Patterns: {summary['unique_patterns']}
-Clusters Found: {summary['clusters_found']}
-Anomalies Detected: {summary['anomalies_detected']}
-Error Rate: {summary['error_rate']:.1%}
-{cost_section}
-
-Severity Distribution:
-{self._format_severity_dist(summary['severity_distribution'])}
-
-Top Patterns (by frequency):
-{clusters_info or 'None'}
-
-Anomalies Detected:
-{anomalies_info or 'None detected'}
-
-Generate a JSON sampling policy with this structure:
-{{
-  "global_rate": 0.0-1.0,
-  "severity_rates": {{
-    "DEBUG": 0.0-1.0,
-    "INFO": 0.0-1.0,
-    "WARNING": 0.0-1.0,
-    "ERROR": 1.0,
-    "CRITICAL": 1.0
-  }},
-  "pattern_rates": {{
-    "pattern_signature": 0.0-1.0
-  }},
-  "anomaly_boost": 1.0-10.0,
-  "reasoning": "Explain your policy decisions"
-}}
-
-Consider:
-1. Which patterns are noisy/repetitive vs valuable signals?
-2. What sampling rates achieve cost target while maintaining observability?
-3. Should any high-volume patterns be sampled more aggressively?
-4. How should we boost sampling during detected anomalies?
-
-REMEMBER: ERROR and CRITICAL must ALWAYS be 1.0 (100% sampling)
-"""
-        return prompt
+        return _PROMPT_TEMPLATE.format_map(
+            {
+                "service_name": service_name,
+                "total_logs": summary["total_logs"],
+                "unique_patterns": summary["unique_patterns"],
+                "clusters_found": summary["clusters_found"],
+                "anomalies_detected": summary["anomalies_detected"],
+                "error_rate": summary["error_rate"],
+                "cost_section": cost_section,
+                "severity_dist": self._format_severity_dist(summary["severity_distribution"]),
+                "clusters": clusters_info or "None",
+                "anomalies": anomalies_info or "None detected",
+            }
+        )
 
     def _format_severity_dist(self, severity_dist: dict) -> str:
         """Format severity distribution for prompt."""
         if not severity_dist:
             return "No data"
 
-        return "\n".join([f"  {severity}: {count} logs" for severity, count in severity_dist.items()])
+        return "\n".join(f"  {severity}: {count} logs" for severity, count in severity_dist.items())
 
     def _validate_and_fix_policy(self, policy: PolicyResponse) -> PolicyResponse:
         """
@@ -140,22 +230,16 @@ REMEMBER: ERROR and CRITICAL must ALWAYS be 1.0 (100% sampling)
 
         Ensures ERROR and CRITICAL are always 1.0 (safety check).
         """
-        policy.severity_rates["ERROR"] = 1.0
-        policy.severity_rates["CRITICAL"] = 1.0
-
-        if policy.global_rate < 0.0:
-            policy.global_rate = 0.0
-        if policy.global_rate > 1.0:
-            policy.global_rate = 1.0
-
-        if policy.anomaly_boost < 1.0:
-            policy.anomaly_boost = 1.0
-
-        for pattern_sig, rate in policy.pattern_rates.items():
-            if rate < 0.0:
-                policy.pattern_rates[pattern_sig] = 0.0
-            if rate > 1.0:
-                policy.pattern_rates[pattern_sig] = 1.0
+        policy.severity_rates.update(self._FORCED_SEVERITY_RATES)
+
+        policy.global_rate = min(max(policy.global_rate, 0.0), 1.0)
+        policy.anomaly_boost = max(policy.anomaly_boost, 1.0)
+
+        # One comprehension rebuilds the dict faster than per-key writes;
+        # for a few hundred rates it also beats a round-trip through numpy.
+        policy.pattern_rates = {
+            sig: 0.0 if rate < 0.0 else 1.0 if rate > 1.0 else rate for sig, rate in policy.pattern_rates.items()
+        }
 
         return policy
 
@@ -1,6 +1,21 @@
 import hashlib
 import re
 
+# Compiled once; compute_signature runs for every analyzed log line.
+# Numbers are replaced first, so the digit-bearing date, time and IP rules
+# could never match afterwards and are not applied. UUID and hex ids only
+# match when they contain no digits for the same reason; this is kept as-is
+# because stored signatures depend on the exact normalization.
+_NUMBER_RE = re.compile(r"\d+")
+_UUID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+_HEX_ID_RE = re.compile(r"\b[0-9a-f]{32}\b")
+_WINDOWS_PATH_RE = re.compile(r"[a-z]:\\[^\s]+")
+_UNIX_PATH_RE = re.compile(r"/[^\s]+/[^\s]+")
+
+# MD5 is only a clustering key here; usedforsecurity=False keeps it available
+# on FIPS-restricted OpenSSL builds.
+_EMPTY_SIGNATURE = hashlib.md5(b"empty", usedforsecurity=False).hexdigest()
+
 
 def compute_signature(message: str) -> str:
     """
@@ -30,34 +45,46 @@ def compute_signature(message: str) -> str:
         'a1b2c3...'  # Same signature - same pattern
     """
     if not message:
-        return hashlib.md5(b"empty").hexdigest()
+        return _EMPTY_SIGNATURE
 
     normalized = message.lower().strip()
+    normalized = _NUMBER_RE.sub("N", normalized)
+    # Substring checks are far cheaper than a regex scan; skip passes whose
+    # required literal is absent.
+    if "-" in normalized:
+        normalized = _UUID_RE.sub("UUID", normalized)
+    normalized = _HEX_ID_RE.sub("UUID", normalized)
+    if ":\\" in normalized:
+        normalized = _WINDOWS_PATH_RE.sub("PATH", normalized)
+    if "/" in normalized:
+        normalized = _UNIX_PATH_RE.sub("PATH", normalized)
+    # The message is already stripped, so this equals collapsing \s+ runs
+    normalized = " ".join(normalized.split())
+
+    return hashlib.md5(normalized.encode(), usedforsecurity=False).hexdigest()
+
+
+def compute_signatures(messages: list[str]) -> list[str]:
+    """
+    Compute signatures for a batch of log messages.
 
-    # Remove numbers
-    normalized = re.sub(r"\d+", "N", normalized)
-
-    # Remove UUIDs (various formats)
-    normalized = re.sub(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", "UUID", normalized)
-    normalized = re.sub(r"\b[0-9a-f]{32}\b", "UUID", normalized)
-
-    # Remove ISO dates (YYYY-MM-DD)
-    normalized = re.sub(r"\d{4}-\d{2}-\d{2}", "DATE", normalized)
-
-    # Remove times (HH:MM:SS)
-    normalized = re.sub(r"\d{2}:\d{2}:\d{2}", "TIME", normalized)
-
-    # Remove IP addresses
-    normalized = re.sub(r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b", "IP", normalized)
-
-    # Remove file paths
-    normalized = re.sub(r"[a-z]:\\[^\s]+", "PATH", normalized)
-    normalized = re.sub(r"/[^\s]+/[^\s]+", "PATH", normalized)
+    Log batches repeat the same raw message many times, so each distinct
+    message is normalized and hashed only once.
 
-    # Collapse multiple spaces
-    normalized = re.sub(r"\s+", " ", normalized)
+    Args:
+        messages: Raw log messages
 
-    return hashlib.md5(normalized.encode()).hexdigest()
+    Returns:
+        Signatures in the same order as messages
+    """
+    signatures: dict[str, str] = {}
+    result = []
+    for message in messages:
+        sig = signatures.get(message)
+        if sig is None:
+            sig = signatures[message] = compute_signature(message)
+        result.append(sig)
+    return result
 
 
 def extract_error_type(message: str) -> str | None:
@@ -115,5 +142,5 @@ def compute_signature_with_context(message: str, severity: str | None = None, er
         context_parts.append(error_type)
 
     combined = ":".join(context_parts)
-    return hashlib.md5(combined.encode()).hexdigest()
+    return hashlib.md5(combined.encode(), usedforsecurity=False).hexdigest()
 
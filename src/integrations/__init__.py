@@ -1,7 +1,7 @@
 """PostHog integration and analysis orchestration."""
 
 from src.integrations.analysis_service import AnalysisService
-from src.integrations.posthog_client import PostHogLogsClient
+from src.integrations.posthog_client import ApiLogsClient, ClickHouseLogsClient, PostHogLogsClient
 
-__all__ = ["PostHogLogsClient", "AnalysisService"]
+__all__ = ["PostHogLogsClient", "ClickHouseLogsClient", "ApiLogsClient", "AnalysisService"]
 
@@ -1,12 +1,27 @@
+import asyncio
+import threading
+from collections.abc import Callable
+
 import structlog
+from cachetools import TTLCache
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from src.engine.analyzer import AnalysisResult, LogAnalyzer
 from src.integrations.posthog_client import PostHogLogsClient
+from src.storage.database import SessionLocal
 from src.storage.models import AnalysisRun, Pattern, Service
 
 logger = structlog.get_logger(__name__)
 
+KNOWN_SIGNATURES_TTL_SECONDS = 300
+
+# service_id -> signatures already stored for it. Services are created per
+# request, so the cache lives at module level; the TTL bounds how stale it
+# can get when another worker stores patterns for the same service.
+_known_signatures: TTLCache[int, set[str]] = TTLCache(maxsize=1024, ttl=KNOWN_SIGNATURES_TTL_SECONDS)
+_known_signatures_lock = threading.Lock()
+
 
 class AnalysisService:
     """
@@ -14,15 +29,17 @@ class AnalysisService:
 
     Fetches logs from PostHog, analyzes patterns, stores results,
     and prepares data for AI policy generation.
+
+    Database work runs in worker threads with short-lived sessions, so no
+    connection is held while logs are fetched or analyzed.
     """
 
-    def __init__(self, posthog_client: PostHogLogsClient):
+    def __init__(self, posthog_client: PostHogLogsClient, session_factory: Callable[[], Session] = SessionLocal):
         self.posthog_client = posthog_client
         self.analyzer = LogAnalyzer()
+        self.session_factory = session_factory
 
-    async def analyze_service(
-        self, team_id: int, service_name: str, hours: int, db: Session
-    ) -> AnalysisResult:
+    async def analyze_service(self, team_id: int, service_name: str, hours: int) -> AnalysisResult:
         """
         Analyze logs for a service from PostHog.
 
@@ -30,38 +47,22 @@ class AnalysisService:
             team_id: PostHog team ID
             service_name: Service to analyze
             hours: Hours of logs to fetch
-            db: Database session
 
         Returns:
             AnalysisResult with patterns and anomalies
         """
-        service = db.query(Service).filter(Service.team_id == team_id, Service.name == service_name).first()
-
-        if not service:
-            service = Service(team_id=team_id, name=service_name, is_active=True)
-            db.add(service)
-            db.commit()
-            db.refresh(service)
-
-        analysis_run = AnalysisRun(service_id=service.id, status="running")
-        db.add(analysis_run)
-        db.commit()
+        service_id, run_id = await asyncio.to_thread(self._start_run, team_id, service_name)
 
         try:
-            logs = await self.posthog_client.fetch_logs(team_id, service_name, hours)
+            logs = await self.posthog_client.fetch_logs_columnar(team_id, service_name, hours)
 
             logger.info("Analyzing logs", service=service_name, log_count=len(logs))
 
-            known_sigs = self._get_known_signatures(db, service.id)
-            result = self.analyzer.analyze(logs, known_signatures=known_sigs)
-
-            self._store_patterns(db, service.id, result)
+            known_sigs = await asyncio.to_thread(self._get_known_signatures, service_id)
+            # Clustering is CPU-bound; keep it off the event loop as well.
+            result = await asyncio.to_thread(self.analyzer.analyze, logs, known_sigs)
 
-            analysis_run.status = "completed"
-            analysis_run.logs_analyzed = len(logs)
-            analysis_run.patterns_found = result.pattern_analysis.total_unique_patterns
-            analysis_run.anomalies_detected = len(result.anomalies)
-            db.commit()
+            await asyncio.to_thread(self._complete_run, run_id, service_id, len(logs), result)
 
             logger.info(
                 "Analysis complete",
@@ -73,40 +74,104 @@ class AnalysisService:
             return result
 
         except Exception as e:
-            analysis_run.status = "failed"
-            analysis_run.error_message = str(e)
-            db.commit()
+            await asyncio.to_thread(self._fail_run, run_id, str(e))
 
             logger.error("Analysis failed", service=service_name, error=str(e))
             raise
 
-    def _get_known_signatures(self, db: Session, service_id: int) -> set[str]:
+    def _start_run(self, team_id: int, service_name: str) -> tuple[int, int]:
+        """Get or create the service and record a running analysis. Returns (service_id, run_id)."""
+        with self.session_factory() as db:
+            # Concurrent first analyses of a service meet on ix_service_team_name;
+            # the no-op update makes RETURNING yield the existing row's id.
+            upsert = insert(Service).values(team_id=team_id, name=service_name, is_active=True)
+            service_id = db.execute(
+                upsert.on_conflict_do_update(
+                    index_elements=[Service.team_id, Service.name], set_={"name": upsert.excluded.name}
+                ).returning(Service.id)
+            ).scalar_one()
+
+            analysis_run = AnalysisRun(service_id=service_id, status="running")
+            db.add(analysis_run)
+            db.commit()
+
+            return service_id, analysis_run.id
+
+    def _complete_run(self, run_id: int, service_id: int, logs_analyzed: int, result: AnalysisResult) -> None:
+        """Store patterns and mark the analysis run completed in one transaction."""
+        with self.session_factory() as db:
+            self._store_patterns(db, service_id, result)
+
+            analysis_run = db.get(AnalysisRun, run_id)
+            analysis_run.status = "completed"
+            analysis_run.logs_analyzed = logs_analyzed
+            analysis_run.patterns_found = result.pattern_analysis.total_unique_patterns
+            analysis_run.anomalies_detected = len(result.anomalies)
+            db.commit()
+
+        with _known_signatures_lock:
+            known = _known_signatures.get(service_id)
+            if known is not None:
+                # Replace rather than mutate: callers may still hold the old set
+                _known_signatures[service_id] = known | {c.signature for c in result.pattern_analysis.clusters}
+
+    def _fail_run(self, run_id: int, error_message: str) -> None:
+        """Mark the analysis run failed."""
+        with self.session_factory() as db:
+            analysis_run = db.get(AnalysisRun, run_id)
+            analysis_run.status = "failed"
+            analysis_run.error_message = error_message
+            db.commit()
+
+    def _get_known_signatures(self, service_id: int) -> set[str]:
         """Get previously seen pattern signatures for new pattern detection."""
-        patterns = db.query(Pattern).filter(Pattern.service_id == service_id).all()
-        return {p.signature for p in patterns}
+        with _known_signatures_lock:
+            known = _known_signatures.get(service_id)
+        if known is not None:
+            return known
+
+        with self.session_factory() as db:
+            rows = db.query(Pattern.signature).filter(Pattern.service_id == service_id).all()
+            known = {row[0] for row in rows}
+
+        with _known_signatures_lock:
+            _known_signatures[service_id] = known
+        return known
 
     def _store_patterns(self, db: Session, service_id: int, result: AnalysisResult) -> None:
-        """Store or update patterns in database."""
-        for cluster in result.pattern_analysis.clusters:
-            existing = db.query(Pattern).filter(Pattern.signature == cluster.signature).first()
-
-            if existing:
-                existing.count += cluster.total_count
-                existing.last_seen = cluster.last_seen
-                existing.severity_distribution = cluster.severity_distribution
-            else:
-                pattern = Pattern(
-                    service_id=service_id,
-                    signature=cluster.signature,
-                    representative_message=cluster.representative_message,
-                    count=cluster.total_count,
-                    sampled_count=0,
-                    first_seen=cluster.first_seen,
-                    last_seen=cluster.last_seen,
-                    severity_distribution=cluster.severity_distribution,
-                )
-                db.add(pattern)
-
-        db.commit()
+        """Store or update patterns in database. The caller commits."""
+        clusters = result.pattern_analysis.clusters
+        if not clusters:
+            return
+
+        # One upsert for every pattern this run touches. Concurrent runs for the
+        # same service may both see a signature as new; ON CONFLICT merges them
+        # on ix_pattern_service_signature instead of failing the second insert.
+        stmt = insert(Pattern).values(
+            [
+                {
+                    "service_id": service_id,
+                    "signature": cluster.signature,
+                    "representative_message": cluster.representative_message,
+                    "count": cluster.total_count,
+                    "sampled_count": 0,
+                    "first_seen": cluster.first_seen,
+                    "last_seen": cluster.last_seen,
+                    "severity_distribution": cluster.severity_distribution,
+                }
+                for cluster in clusters
+            ]
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Pattern.service_id, Pattern.signature],
+                set_={
+                    "count": Pattern.count + stmt.excluded.count,
+                    "last_seen": stmt.excluded.last_seen,
+                    "severity_distribution": stmt.excluded.severity_distribution,
+                },
+            )
+        )
+
         logger.info("Stored patterns", service_id=service_id, pattern_count=len(result.pattern_analysis.clusters))
 
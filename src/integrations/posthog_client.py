@@ -1,24 +1,91 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
 
 import httpx
+import orjson
 import structlog
+from cachetools import TTLCache
 from clickhouse_driver import Client as ClickHouseClient
 
-from src.engine.pattern_analyzer import LogEntry
+from src.engine.pattern_analyzer import LogBatch, LogEntry
 
 logger = structlog.get_logger(__name__)
 
+API_TIMEOUT_SECONDS = 30.0
+# Rows per block streamed back from ClickHouse during log fetches
+CLICKHOUSE_MAX_BLOCK_SIZE = 8192
+# Active services and log volume change slowly; repeated polls reuse results
+SERVICES_TTL_SECONDS = 30
+VOLUME_TTL_SECONDS = 30
+# Upper bound on concurrent time-window requests for one API fetch
+MAX_API_WINDOWS = 8
+
+_API_LOGS_QUERY = (
+    "SELECT body, severity_text, timestamp, service_name FROM logs "
+    "WHERE {conditions} ORDER BY timestamp DESC LIMIT {{limit}}"
+)
+
+# Lookups keyed by (host, port, ...) of the ClickHouse server they came from.
+# Clients are created per request, so the caches live at module level; the
+# lock covers the worker threads and event loops that may share them.
+_services_cache: TTLCache[tuple[str, int, int, int], list[str]] = TTLCache(maxsize=1024, ttl=SERVICES_TTL_SECONDS)
+_volume_cache: TTLCache[tuple[str, int, int, str, int], int] = TTLCache(maxsize=4096, ttl=VOLUME_TTL_SECONDS)
+_lookup_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _http_client() -> httpx.AsyncClient:
+    """
+    Connection pool for PostHog API calls.
+
+    PostHogLogsClient is created per request, so the pool is shared at module
+    level; reusing it skips a TCP and TLS handshake on every fetch.
+    """
+    return httpx.AsyncClient(
+        timeout=API_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+
+
+async def close_http_client() -> None:
+    """Close the shared PostHog API connection pool (called on app shutdown)."""
+    if _http_client.cache_info().currsize:
+        await _http_client().aclose()
+        _http_client.cache_clear()
+
 
-class PostHogLogsClient:
+class PostHogLogsClient(ABC):
     """
     Client for fetching logs from PostHog.
 
-    Supports two modes:
+    Supports two modes, chosen once at construction:
     1. Direct ClickHouse queries (fastest, requires ClickHouse access)
     2. PostHog REST API (easier, uses PostHog's query endpoint)
+
+    PostHogLogsClient(...) returns a ClickHouseLogsClient when clickhouse_host
+    is given, otherwise an ApiLogsClient; without either it raises ValueError.
     """
 
+    def __new__(
+        cls,
+        clickhouse_host: str | None = None,
+        clickhouse_port: int = 9000,
+        api_url: str | None = None,
+        api_key: str | None = None,
+        **kwargs,
+    ):
+        if cls is PostHogLogsClient:
+            if clickhouse_host:
+                cls = ClickHouseLogsClient
+            elif api_url and api_key:
+                cls = ApiLogsClient
+            else:
+                raise ValueError("Either ClickHouse host or API credentials required")
+        return super().__new__(cls)
+
     def __init__(
         self,
         clickhouse_host: str | None = None,
@@ -40,14 +107,6 @@ class PostHogLogsClient:
         self.api_url = api_url
         self.api_key = api_key
 
-        self.clickhouse_client: Optional[ClickHouseClient] = None
-        if clickhouse_host:
-            self.clickhouse_client = ClickHouseClient(
-                host=clickhouse_host,
-                port=clickhouse_port,
-                database="default",
-            )
-
     async def fetch_logs(
         self,
         team_id: int,
@@ -67,52 +126,83 @@ class PostHogLogsClient:
         Returns:
             List of LogEntry objects
         """
-        if self.clickhouse_client:
-            return await self._fetch_from_clickhouse(team_id, service_name, hours, limit)
-        elif self.api_url and self.api_key:
-            return await self._fetch_from_api(team_id, service_name, hours, limit)
-        else:
-            raise ValueError("Either ClickHouse client or API credentials required")
+        batch = await self.fetch_logs_columnar(team_id, service_name, hours, limit)
+        return batch.to_entries()
 
-    async def _fetch_from_clickhouse(
-        self, team_id: int, service_name: str | None, hours: int, limit: int
-    ) -> list[LogEntry]:
+    @abstractmethod
+    async def fetch_logs_columnar(
+        self,
+        team_id: int,
+        service_name: str | None = None,
+        hours: int = 1,
+        limit: int = 10000,
+    ) -> LogBatch:
         """
-        Fetch logs directly from ClickHouse (fastest method).
+        Fetch logs from PostHog as parallel columns.
 
-        Queries PostHog's 'logs' table directly.
+        Same arguments as fetch_logs, but no per-row object is built; the
+        result can be passed straight to the analyzers.
+
+        Returns:
+            LogBatch with one entry per log in each column
         """
-        where_clauses = [f"team_id = {team_id}", f"timestamp >= now() - INTERVAL {hours} HOUR"]
+
+
+class ClickHouseLogsClient(PostHogLogsClient):
+    """PostHog logs client that queries ClickHouse directly."""
+
+    def __init__(
+        self,
+        clickhouse_host: str | None = None,
+        clickhouse_port: int = 9000,
+        api_url: str | None = None,
+        api_key: str | None = None,
+    ):
+        super().__init__(clickhouse_host, clickhouse_port, api_url, api_key)
+
+        self.clickhouse_client = ClickHouseClient(
+            host=clickhouse_host,
+            port=clickhouse_port,
+            database="default",
+        )
+        # A clickhouse-driver Client holds one connection and is not safe to
+        # share between threads; queries run in worker threads one at a time.
+        self._clickhouse_lock = threading.Lock()
+
+    async def fetch_logs_columnar(
+        self,
+        team_id: int,
+        service_name: str | None = None,
+        hours: int = 1,
+        limit: int = 10000,
+    ) -> LogBatch:
+        """Fetch logs by querying PostHog's 'logs' table directly."""
+        # PREWHERE filters on these narrow columns before the wide body column
+        # is read; values are bound by the driver rather than interpolated.
+        prewhere_clauses = ["team_id = %(team_id)s", "timestamp >= now() - INTERVAL %(hours)s HOUR"]
+        params = {"team_id": team_id, "hours": hours, "limit": limit}
 
         if service_name:
-            where_clauses.append(f"service_name = '{service_name}'")
+            prewhere_clauses.append("service_name = %(service_name)s")
+            params["service_name"] = service_name
 
         query = f"""
-        SELECT 
+        SELECT
             body,
             severity_text,
             timestamp,
             service_name
         FROM logs
-        WHERE {' AND '.join(where_clauses)}
+        PREWHERE {' AND '.join(prewhere_clauses)}
         ORDER BY timestamp DESC
-        LIMIT {limit}
+        LIMIT %(limit)s
         """
 
         logger.info("Fetching logs from ClickHouse", team_id=team_id, service_name=service_name, hours=hours)
 
         try:
-            rows = self.clickhouse_client.execute(query)
-
-            logs = [
-                LogEntry(
-                    message=row[0] or "",
-                    severity=row[1] or "INFO",
-                    timestamp=row[2] if isinstance(row[2], datetime) else datetime.fromisoformat(str(row[2])),
-                    service_name=row[3] or "unknown",
-                )
-                for row in rows
-            ]
+            # clickhouse-driver is blocking; run the query in a worker thread.
+            logs = await asyncio.to_thread(self._stream_log_columns, query, params)
 
             logger.info("Fetched logs from ClickHouse", count=len(logs))
             return logs
@@ -121,58 +211,38 @@ class PostHogLogsClient:
             logger.error("Failed to fetch logs from ClickHouse", error=str(e))
             raise
 
-    async def _fetch_from_api(
-        self, team_id: int, service_name: str | None, hours: int, limit: int
-    ) -> list[LogEntry]:
+    def _stream_log_columns(self, query: str, params: dict) -> LogBatch:
         """
-        Fetch logs via PostHog REST API.
+        Run a log query and fill the batch columns block by block.
 
-        Uses PostHog's /api/projects/@current/logs/query endpoint.
+        execute_iter streams result blocks, so the raw row tuples are never
+        all held in memory alongside the columns.
         """
-        date_from = datetime.now() - timedelta(hours=hours)
-
-        query_data = {
-            "query": {
-                "dateRange": {"from": date_from.isoformat()},
-                "limit": limit,
-            }
-        }
+        messages: list[str] = []
+        severities: list[str] = []
+        timestamps: list[datetime] = []
+        service_names: list[str] = []
+
+        with self._clickhouse_lock:
+            rows = self.clickhouse_client.execute_iter(
+                query, params, settings={"max_block_size": CLICKHOUSE_MAX_BLOCK_SIZE}
+            )
 
-        if service_name:
-            query_data["query"]["serviceNames"] = [service_name]
-
-        logger.info("Fetching logs from PostHog API", team_id=team_id, service_name=service_name)
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.api_url}/api/projects/{team_id}/logs/query",
-                    headers={"Authorization": f"Bearer {self.api_key}"},
-                    json=query_data,
-                    timeout=30.0,
-                )
-
-                response.raise_for_status()
-                data = response.json()
-
-                logs = [
-                    LogEntry(
-                        message=result.get("body", ""),
-                        severity=result.get("severity_text", "INFO"),
-                        timestamp=datetime.fromisoformat(result.get("timestamp")),
-                        service_name=result.get("service_name", "unknown"),
-                    )
-                    for result in data.get("results", [])
-                ]
+            # The driver already returns DateTime columns as datetime objects
+            for body, severity, timestamp, service in rows:
+                messages.append(body or "")
+                severities.append(severity or "INFO")
+                timestamps.append(timestamp)
+                service_names.append(service or "unknown")
 
-                logger.info("Fetched logs from PostHog API", count=len(logs))
-                return logs
+        return LogBatch(messages=messages, severities=severities, timestamps=timestamps, service_names=service_names)
 
-            except httpx.HTTPError as e:
-                logger.error("Failed to fetch logs from PostHog API", error=str(e))
-                raise
+    def _execute(self, query: str, params: dict) -> list[tuple]:
+        """Run a ClickHouse query; call via asyncio.to_thread."""
+        with self._clickhouse_lock:
+            return self.clickhouse_client.execute(query, params)
 
-    def get_log_volume(self, team_id: int, service_name: str, hours: int = 24) -> int:
+    async def get_log_volume(self, team_id: int, service_name: str, hours: int = 24) -> int:
         """
         Get total log volume for cost estimation.
 
@@ -184,25 +254,32 @@ class PostHogLogsClient:
         Returns:
             Total number of logs
         """
-        if not self.clickhouse_client:
-            raise ValueError("ClickHouse client required for volume queries")
+        key = (self.clickhouse_host, self.clickhouse_port, team_id, service_name, hours)
+        with _lookup_cache_lock:
+            cached = _volume_cache.get(key)
+        if cached is not None:
+            return cached
 
-        query = f"""
+        query = """
         SELECT COUNT(*)
         FROM logs
-        WHERE team_id = {team_id}
-          AND service_name = '{service_name}'
-          AND timestamp >= now() - INTERVAL {hours} HOUR
+        WHERE team_id = %(team_id)s
+          AND service_name = %(service_name)s
+          AND timestamp >= now() - INTERVAL %(hours)s HOUR
         """
+        params = {"team_id": team_id, "service_name": service_name, "hours": hours}
 
         try:
-            result = self.clickhouse_client.execute(query)
-            return result[0][0] if result else 0
+            result = await asyncio.to_thread(self._execute, query, params)
+            volume = result[0][0] if result else 0
+            with _lookup_cache_lock:
+                _volume_cache[key] = volume
+            return volume
         except Exception as e:
             logger.error("Failed to get log volume", error=str(e))
             return 0
 
-    def get_active_services(self, team_id: int, hours: int = 24) -> list[str]:
+    async def get_active_services(self, team_id: int, hours: int = 24) -> list[str]:
         """
         Get list of active services for a team.
 
@@ -213,21 +290,117 @@ class PostHogLogsClient:
         Returns:
             List of service names
         """
-        if not self.clickhouse_client:
-            raise ValueError("ClickHouse client required for service queries")
+        key = (self.clickhouse_host, self.clickhouse_port, team_id, hours)
+        with _lookup_cache_lock:
+            cached = _services_cache.get(key)
+        if cached is not None:
+            return list(cached)
 
-        query = f"""
+        query = """
         SELECT DISTINCT service_name
         FROM logs
-        WHERE team_id = {team_id}
-          AND timestamp >= now() - INTERVAL {hours} HOUR
+        WHERE team_id = %(team_id)s
+          AND timestamp >= now() - INTERVAL %(hours)s HOUR
         ORDER BY service_name
         """
+        params = {"team_id": team_id, "hours": hours}
 
         try:
-            rows = self.clickhouse_client.execute(query)
-            return [row[0] for row in rows if row[0]]
+            rows = await asyncio.to_thread(self._execute, query, params)
+            services = [row[0] for row in rows if row[0]]
+            with _lookup_cache_lock:
+                _services_cache[key] = services
+            return list(services)
         except Exception as e:
             logger.error("Failed to get active services", error=str(e))
             return []
 
+
+class ApiLogsClient(PostHogLogsClient):
+    """PostHog logs client that goes through PostHog's HTTP query API."""
+
+    async def fetch_logs_columnar(
+        self,
+        team_id: int,
+        service_name: str | None = None,
+        hours: int = 1,
+        limit: int = 10000,
+    ) -> LogBatch:
+        """
+        Fetch logs via PostHog REST API.
+
+        Sends HogQL queries to PostHog's /api/projects/:id/query/ endpoint.
+        The time range is split into up to MAX_API_WINDOWS equal windows that
+        are fetched concurrently, newest first, each with its share of limit.
+        """
+        windows = min(max(1, hours), MAX_API_WINDOWS, max(1, limit))
+        window = timedelta(hours=hours) / windows
+        now = datetime.now()
+
+        logger.info("Fetching logs from PostHog API", team_id=team_id, service_name=service_name, windows=windows)
+
+        try:
+            pages = await asyncio.gather(
+                *[
+                    self._fetch_api_window(
+                        team_id,
+                        service_name,
+                        date_from=now - (i + 1) * window,
+                        date_to=now - i * window,
+                        limit=limit // windows + (1 if i < limit % windows else 0),
+                    )
+                    for i in range(windows)
+                ]
+            )
+
+            logs = LogBatch(
+                messages=[m for page in pages for m in page.messages],
+                severities=[s for page in pages for s in page.severities],
+                timestamps=[t for page in pages for t in page.timestamps],
+                service_names=[n for page in pages for n in page.service_names],
+            )
+
+            logger.info("Fetched logs from PostHog API", count=len(logs))
+            return logs
+
+        except httpx.HTTPError as e:
+            logger.error("Failed to fetch logs from PostHog API", error=str(e))
+            raise
+
+    async def _fetch_api_window(
+        self, team_id: int, service_name: str | None, date_from: datetime, date_to: datetime, limit: int
+    ) -> LogBatch:
+        """Fetch one time window of logs from the PostHog API."""
+        # Only the four columns LogBatch needs are projected; values are bound
+        # as HogQL placeholders rather than interpolated.
+        conditions = ["timestamp >= {date_from}", "timestamp < {date_to}"]
+        values = {"date_from": date_from.isoformat(), "date_to": date_to.isoformat(), "limit": limit}
+
+        if service_name:
+            conditions.append("service_name = {service_name}")
+            values["service_name"] = service_name
+
+        query_data = {
+            "query": {
+                "kind": "HogQLQuery",
+                "query": _API_LOGS_QUERY.format(conditions=" AND ".join(conditions)),
+                "values": values,
+            }
+        }
+
+        response = await _http_client().post(
+            f"{self.api_url}/api/projects/{team_id}/query/",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json=query_data,
+        )
+
+        response.raise_for_status()
+        rows = orjson.loads(response.content).get("results", [])
+
+        # Rows come back positionally in _API_LOGS_QUERY's column order
+        return LogBatch(
+            messages=[row[0] or "" for row in rows],
+            severities=[row[1] or "INFO" for row in rows],
+            timestamps=[datetime.fromisoformat(row[2]) for row in rows],
+            service_names=[row[3] or "unknown" for row in rows],
+        )
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import UTC, datetime
+
+import httpx
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+METRICS_QUEUE_SIZE = 10000
+METRICS_BATCH_SIZE = 500
+METRICS_FLUSH_INTERVAL_SECONDS = 5.0
+
+
+class RequestMetrics:
+    """
+    Ships per-request timings to PostHog without touching the request path.
+
+    The HTTP middleware only calls record(), a non-blocking queue put; a
+    background task drains the queue and posts events in batches to
+    PostHog's /batch/ endpoint. When the queue is full, new timings are
+    dropped and counted rather than slowing requests down.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        queue_size: int = METRICS_QUEUE_SIZE,
+        batch_size: int = METRICS_BATCH_SIZE,
+        flush_interval: float = METRICS_FLUSH_INTERVAL_SECONDS,
+    ):
+        self.api_url = api_url.rstrip("/")
+        self.api_key = api_key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=queue_size)
+        self._task: asyncio.Task | None = None
+        self._client: httpx.AsyncClient | None = None
+
+    def record(self, method: str, route: str, status_code: int, duration_ns: int) -> None:
+        """Queue one request timing; never blocks."""
+        try:
+            self._queue.put_nowait(
+                {
+                    "event": "lipservice_request",
+                    "distinct_id": "lipservice-api",
+                    "timestamp": datetime.now(UTC).isoformat(),
+                    "properties": {
+                        "method": method,
+                        "route": route,
+                        "status_code": status_code,
+                        "duration_ms": duration_ns / 1_000_000,
+                    },
+                }
+            )
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self) -> None:
+        """Start the background drain task."""
+        if self._task is None:
+            self._client = httpx.AsyncClient(timeout=10.0)
+            self._task = asyncio.create_task(self._drain())
+
+    async def stop(self) -> None:
+        """Stop draining and flush whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while not self._queue.empty():
+            await self._send(self._take_batch())
+
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _take_batch(self) -> list[dict]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _drain(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            while not self._queue.empty():
+                await self._send(self._take_batch())
+
+    async def _send(self, batch: list[dict]) -> None:
+        if not batch or self._client is None:
+            return
+        try:
+            response = await self._client.post(f"{self.api_url}/batch/", json={"api_key": self.api_key, "batch": batch})
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning("Failed to send request metrics", events=len(batch), error=str(e))
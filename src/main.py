@@ -1,15 +1,61 @@
-from fastapi import FastAPI
+import os
+import time
+import asyncio
+import hashlib
+import importlib
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
 from pydantic import BaseModel
 
-from src.api.analysis import router as analysis_router
-from src.api.patterns import router as patterns_router
-from src.api.pipeline import router as pipeline_router
-from src.api.policies import router as policies_router
-from src.api.services import router as services_router
-from src.api.intelligent_analysis import router as intelligent_analysis_router
-from src.api.adaptive_filtering import router as adaptive_filtering_router
-from src.api.realtime_streaming import router as realtime_streaming_router
-from src.api.visualization import router as visualization_router
+from src.integrations.request_metrics import RequestMetrics
+
+# Router modules under src.api, grouped by feature. Only the features listed
+# in LIPSERVICE_FEATURES (default: all) are imported, at startup in the
+# lifespan, so a slimmed-down deployment does not pay the import cost of the
+# ML and streaming stacks.
+FEATURE_ROUTERS: dict[str, tuple[str, ...]] = {
+    "core": ("services", "policies", "patterns", "analysis", "pipeline"),
+    "intelligent": ("intelligent_analysis", "adaptive_filtering"),
+    "streaming": ("realtime_streaming",),
+    "viz": ("visualization",),
+}
+
+
+def _enabled_features() -> list[str]:
+    """Parse LIPSERVICE_FEATURES into a list of known feature names."""
+    raw = os.getenv("LIPSERVICE_FEATURES", ",".join(FEATURE_ROUTERS))
+    features = [name.strip() for name in raw.split(",") if name.strip()]
+
+    unknown = set(features) - FEATURE_ROUTERS.keys()
+    if unknown:
+        raise ValueError(f"Unknown LIPSERVICE_FEATURES entries: {', '.join(sorted(unknown))}")
+
+    return features
+
+
+async def _mount_routers(app: FastAPI) -> None:
+    """
+    Import the enabled router modules and include them in the app.
+
+    Imports block, so each runs in a worker thread and independent modules
+    load concurrently; routers are still included in FEATURE_ROUTERS order.
+    """
+    module_names = [name for feature in ENABLED_FEATURES for name in FEATURE_ROUTERS[feature]]
+    modules = await asyncio.gather(
+        *(asyncio.to_thread(importlib.import_module, f"src.api.{name}") for name in module_names)
+    )
+    for module in modules:
+        app.include_router(module.router)
+
+
+ENABLED_FEATURES = _enabled_features()
+
+# Request timing export is opt-in: both variables must point at a PostHog project
+_metrics_url = os.getenv("METRICS_POSTHOG_URL")
+_metrics_api_key = os.getenv("METRICS_POSTHOG_API_KEY")
+request_metrics = RequestMetrics(_metrics_url, _metrics_api_key) if _metrics_url and _metrics_api_key else None
 
 
 class HealthResponse(BaseModel):
@@ -22,36 +68,92 @@ class RootResponse(BaseModel):
     status: str
 
 
+# Both bodies are constant, so they are serialized once and served with cache
+# headers; probes and CDNs can then answer from cache or with a 304.
+_HEALTH_BODY = HealthResponse(status="healthy").model_dump_json()
+_ROOT_BODY = RootResponse(
+    name="LipService",
+    version="0.3.0",
+    status="production ready with real-time streaming",
+).model_dump_json()
+_ROOT_ETAG = f'"{hashlib.md5(_ROOT_BODY.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # The lifespan runs again each time the app is restarted (e.g. per TestClient)
+    if not getattr(app.state, "routers_mounted", False):
+        await _mount_routers(app)
+        app.state.routers_mounted = True
+
+    if request_metrics is not None:
+        request_metrics.start()
+
+    # Start the real-time streaming service once, before serving requests,
+    # rather than lazily from whichever request arrives first.
+    if "streaming" in ENABLED_FEATURES:
+        from src.api.realtime_streaming import start_streaming_service, stop_streaming_service
+
+        await start_streaming_service()
+        yield
+        await stop_streaming_service()
+    else:
+        yield
+
+    if "core" in ENABLED_FEATURES:
+        from src.api.pipeline import clear_provider_cache
+
+        clear_provider_cache()
+
+    # Any feature may have used the shared connection pools; a restarted app
+    # (e.g. a second TestClient) gets fresh ones bound to its own event loop.
+    from src.engine.llm_provider import close_http_client as close_llm_http_client
+    from src.integrations.posthog_client import close_http_client as close_posthog_http_client
+
+    await close_posthog_http_client()
+    await close_llm_http_client()
+
+    if request_metrics is not None:
+        await request_metrics.stop()
+
+
 app = FastAPI(
     title="LipService",
     description="AI-powered intelligent log sampling with real-time streaming and advanced visualization",
     version="0.3.0",
+    lifespan=lifespan,
 )
 
-# Include routers
-app.include_router(services_router)
-app.include_router(policies_router)
-app.include_router(patterns_router)
-app.include_router(analysis_router)
-app.include_router(pipeline_router)
-app.include_router(intelligent_analysis_router)
-app.include_router(adaptive_filtering_router)
-app.include_router(realtime_streaming_router)
-app.include_router(visualization_router)
+if request_metrics is not None:
+
+    @app.middleware("http")
+    async def record_request_timing(request: Request, call_next) -> Response:
+        start = time.perf_counter_ns()
+        response = await call_next(request)
+        # The route template keeps paths like /policies/{service_name} to one series
+        route = request.scope.get("route")
+        request_metrics.record(
+            request.method,
+            route.path if route else request.url.path,
+            response.status_code,
+            time.perf_counter_ns() - start,
+        )
+        return response
 
 
 @app.get("/health", response_model=HealthResponse)
-async def health() -> HealthResponse:
-    return HealthResponse(status="healthy")
+async def health() -> Response:
+    # max-age=1 lets a proxy coalesce a burst of probes without hiding an outage
+    return Response(content=_HEALTH_BODY, media_type="application/json", headers={"Cache-Control": "max-age=1"})
 
 
 @app.get("/", response_model=RootResponse)
-async def root() -> RootResponse:
-    return RootResponse(
-        name="LipService",
-        version="0.3.0",
-        status="production ready with real-time streaming",
-    )
+async def root(request: Request) -> Response:
+    headers = {"Cache-Control": "public, max-age=86400", "ETag": _ROOT_ETAG}
+    if_none_match = request.headers.get("if-none-match", "")
+    if _ROOT_ETAG in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=_ROOT_BODY, media_type="application/json", headers=headers)
 
 
 if __name__ == "__main__":
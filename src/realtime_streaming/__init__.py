@@ -6,12 +6,14 @@ capabilities for LipService.
 """
 
 import asyncio
-import json
 import time
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, AsyncGenerator, Callable
+from collections import deque
+from datetime import UTC, datetime, timedelta
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, AsyncGenerator, Callable
 from uuid import uuid4
 
+import orjson
 import websockets
 from fastapi import WebSocket, WebSocketDisconnect
 from pydantic import BaseModel, Field
@@ -20,6 +22,44 @@ from src.intelligent_analysis import LogEntry, IntelligentLogAnalyzer, LogInsigh
 from src.adaptive_filtering import AdaptiveLogFilter, FilterContext, SamplingDecision
 
 
+def _encode_message(message: Dict[str, Any]) -> bytes:
+    """Serialize an outgoing WebSocket message to a binary frame.
+
+    orjson encodes datetimes natively and is several times faster than
+    json.dumps on the broadcast path; anything else it cannot handle falls
+    back to str(), as json.dumps(default=str) did. The bytes are sent as-is
+    with send_bytes, skipping the str round-trip send_text would need.
+    
+    Timestamps here come from utcnow(), so naive datetimes are tagged as
+    UTC, and NumPy scalars from the analyzers are written as numbers
+    instead of going through the str() fallback.
+    
+    Models are passed in as model_dump() dicts rather than spliced in with
+    model_dump_json(): the two cost about the same, but model_dump_json()
+    drops the UTC offset and raises on values it cannot serialize.
+    """
+    return orjson.dumps(
+        message,
+        default=str,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+    )
+
+
+# Everything in the welcome frame but its timestamp is fixed, so it is encoded
+# once and the timestamp is spliced in per connection
+_WELCOME_FRAME_PREFIX = _encode_message({
+    "type": "welcome",
+    "message": "Connected to LipService Real-Time Stream",
+    "capabilities": [
+        "log_streaming",
+        "real_time_analysis",
+        "live_insights",
+        "adaptive_filtering",
+        "metrics_monitoring"
+    ]
+})[:-1]
+
+
 class StreamConfig(BaseModel):
     """Configuration for log streaming"""
     buffer_size: int = Field(default=1000, ge=1, le=10000)
@@ -56,48 +96,62 @@ class StreamAlert(BaseModel):
 
 class StreamEvent(BaseModel):
     """Real-time stream event"""
-    event_type: str  # log_received, log_processed, insight_generated, alert_triggered
+    event_type: str  # logs_received, batch_processed, insight_generated, alert_triggered
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     data: Dict[str, Any] = Field(default_factory=dict)
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
 class LogBuffer:
-    """Thread-safe log buffer for streaming"""
+    """Log buffer for streaming with a single consumer
     
-    def __init__(self, max_size: int = 1000):
+    Everything runs on the event loop and no method awaits while touching
+    the deque, so no lock is needed; an Event wakes the one consumer once
+    batch_threshold logs are buffered rather than on every add.
+    """
+    
+    def __init__(self, max_size: int = 1000, batch_threshold: int = 1):
         self.max_size = max_size
-        self.buffer: List[LogEntry] = []
-        self._lock = asyncio.Lock()
-        self._condition = asyncio.Condition(self._lock)
+        self.batch_threshold = min(batch_threshold, max_size)
+        # deque(maxlen) drops the oldest logs on overflow in O(1)
+        self.buffer: Deque[LogEntry] = deque(maxlen=max_size)
+        self._batch_ready = asyncio.Event()
     
     async def add_log(self, log: LogEntry) -> None:
         """Add log to buffer"""
-        async with self._condition:
-            self.buffer.append(log)
-            
-            # Remove oldest logs if buffer is full
-            while len(self.buffer) > self.max_size:
-                self.buffer.pop(0)
-            
-            self._condition.notify_all()
+        self.buffer.append(log)
+        if len(self.buffer) >= self.batch_threshold:
+            self._batch_ready.set()
+    
+    async def add_logs(self, logs: List[LogEntry]) -> None:
+        """Add a batch of logs to buffer"""
+        if not logs:
+            return
+        
+        self.buffer.extend(logs)
+        if len(self.buffer) >= self.batch_threshold:
+            self._batch_ready.set()
     
     async def get_logs(self, max_count: int = None) -> List[LogEntry]:
         """Get logs from buffer"""
-        async with self._condition:
-            if max_count is None:
-                max_count = len(self.buffer)
-            
-            logs = self.buffer[:max_count]
-            self.buffer = self.buffer[max_count:]
+        if max_count is None or max_count >= len(self.buffer):
+            logs = list(self.buffer)
+            self.buffer.clear()
             return logs
+        
+        popleft = self.buffer.popleft
+        return [popleft() for _ in range(max_count)]
     
     async def wait_for_logs(self, timeout: float = None) -> bool:
-        """Wait for logs to be available"""
-        async with self._condition:
-            if not self.buffer:
-                await self._condition.wait(timeout)
-            return len(self.buffer) > 0
+        """Wait for batch_threshold logs or until timeout; returns whether any logs are buffered"""
+        if len(self.buffer) < self.batch_threshold:
+            # Clear any stale wake-up left over from logs already drained
+            self._batch_ready.clear()
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return len(self.buffer) > 0
     
     def size(self) -> int:
         """Get current buffer size"""
@@ -107,16 +161,23 @@ class LogBuffer:
 class RealTimeLogProcessor:
     """Real-time log processor with intelligent analysis"""
     
+    MAX_ALERTS = 100
+    # Seconds between throughput/metrics refreshes, independent of log traffic
+    METRICS_INTERVAL_SECONDS = 1.0
+    
     def __init__(self, config: StreamConfig = None):
         self.config = config or StreamConfig()
-        self.buffer = LogBuffer(self.config.buffer_size)
+        self.buffer = LogBuffer(self.config.buffer_size, batch_threshold=self.config.batch_size)
         self.analyzer = IntelligentLogAnalyzer()
         self.filter_engine = AdaptiveLogFilter()
         self.metrics = StreamMetrics()
-        self.alerts: List[StreamAlert] = []
+        # Only the most recent MAX_ALERTS are kept; the deque evicts the oldest
+        self.alerts: Deque[StreamAlert] = deque(maxlen=self.MAX_ALERTS)
+        self.alerts_by_id: Dict[str, StreamAlert] = {}
         self.event_handlers: List[Callable] = []
         self._running = False
         self._processing_task: Optional[asyncio.Task] = None
+        self._metrics_task: Optional[asyncio.Task] = None
     
     async def start(self) -> None:
         """Start the real-time processor"""
@@ -125,98 +186,115 @@ class RealTimeLogProcessor:
         
         self._running = True
         self._processing_task = asyncio.create_task(self._processing_loop())
+        self._metrics_task = asyncio.create_task(self._metrics_loop())
         await self._emit_event("processor_started", {"timestamp": datetime.utcnow()})
     
     async def stop(self) -> None:
         """Stop the real-time processor"""
         self._running = False
-        if self._processing_task:
-            self._processing_task.cancel()
-            try:
-                await self._processing_task
-            except asyncio.CancelledError:
-                pass
+        for task in (self._processing_task, self._metrics_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
         
         await self._emit_event("processor_stopped", {"timestamp": datetime.utcnow()})
     
     async def add_log(self, log: LogEntry) -> None:
         """Add log for real-time processing"""
+        # Counted only; handlers hear about logs through batch_processed
         await self.buffer.add_log(log)
         self.metrics.logs_received += 1
-        await self._emit_event("log_received", {"log_id": log.id, "level": log.level})
+    
+    async def add_logs(self, logs: List[LogEntry]) -> None:
+        """Add a batch of logs for real-time processing.
+        
+        The processing loop already drains the buffer in batch_size chunks, so
+        this hands the whole batch over at once and emits a single event
+        instead of one per log.
+        """
+        if not logs:
+            return
+        
+        await self.buffer.add_logs(logs)
+        self.metrics.logs_received += len(logs)
+        await self._emit_event("logs_received", {"log_count": len(logs)})
     
     async def _processing_loop(self) -> None:
         """Main processing loop"""
         while self._running:
             try:
-                # Wait for logs or timeout
+                # Wake on a full batch, or after flush_interval with whatever is buffered
                 has_logs = await self.buffer.wait_for_logs(self.config.flush_interval)
                 
                 if has_logs:
                     await self._process_batch()
                 
-                # Update metrics
-                await self._update_metrics()
-                
             except Exception as e:
                 self.metrics.error_count += 1
                 await self._emit_event("processing_error", {"error": str(e)})
                 await asyncio.sleep(1)  # Brief pause on error
     
+    async def _metrics_loop(self) -> None:
+        """Refresh metrics on a fixed cadence, off the processing path"""
+        while self._running:
+            await asyncio.sleep(self.METRICS_INTERVAL_SECONDS)
+            await self._update_metrics()
+    
     async def _process_batch(self) -> None:
         """Process a batch of logs"""
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         # Get logs from buffer
         logs = await self.buffer.get_logs(self.config.batch_size)
         if not logs:
             return
         
-        # Process each log
-        for log in logs:
-            await self._process_single_log(log)
+        # Filter the whole batch, then analyze the survivors in one call
+        kept = await self._filter_logs(logs)
+        if kept:
+            await self._analyze_logs(kept)
+        self.metrics.logs_filtered += len(kept)
         
         # Update processing latency
-        processing_time = (time.time() - start_time) * 1000
+        processing_time = (time.perf_counter_ns() - start_ns) / 1e6
         self.metrics.processing_latency_ms = processing_time
         self.metrics.logs_processed += len(logs)
         
         await self._emit_event("batch_processed", {
             "log_count": len(logs),
+            "kept_count": len(kept),
             "processing_time_ms": processing_time
         })
     
-    async def _process_single_log(self, log: LogEntry) -> None:
-        """Process a single log entry"""
-        try:
-            # Apply adaptive filtering
-            context = FilterContext(base_sampling_rate=0.1)
-            decision = await self.filter_engine.adaptive_filter(log, context)
-            
-            if decision.sampling_rate > 0:
-                # Log passed filtering - analyze it
-                await self._analyze_log(log)
-                self.metrics.logs_filtered += 1
-                
-                await self._emit_event("log_processed", {
+    async def _filter_logs(self, logs: List[LogEntry]) -> List[LogEntry]:
+        """Apply adaptive filtering to a batch, returning the logs that pass"""
+        context = FilterContext(base_sampling_rate=0.1)
+        decisions = await asyncio.gather(
+            *(self.filter_engine.adaptive_filter(log, context) for log in logs),
+            return_exceptions=True
+        )
+        
+        kept = []
+        for log, decision in zip(logs, decisions):
+            if isinstance(decision, Exception):
+                self.metrics.error_count += 1
+                await self._emit_event("log_processing_error", {
                     "log_id": log.id,
-                    "sampling_rate": decision.sampling_rate,
-                    "reason": decision.reason
+                    "error": str(decision)
                 })
-            
-        except Exception as e:
-            self.metrics.error_count += 1
-            await self._emit_event("log_processing_error", {
-                "log_id": log.id,
-                "error": str(e)
-            })
+            elif decision.sampling_rate > 0:
+                kept.append(log)
+        return kept
     
-    async def _analyze_log(self, log: LogEntry) -> None:
-        """Analyze a single log for insights"""
+    async def _analyze_logs(self, logs: List[LogEntry]) -> None:
+        """Analyze a batch of logs for insights"""
         try:
             # Perform intelligent analysis
             result = await self.analyzer.analyze_logs(
-                logs=[log],
+                logs=logs,
                 analysis_types=["insights"]
             )
             
@@ -226,7 +304,7 @@ class RealTimeLogProcessor:
                 
         except Exception as e:
             await self._emit_event("analysis_error", {
-                "log_id": log.id,
+                "log_count": len(logs),
                 "error": str(e)
             })
     
@@ -256,11 +334,10 @@ class RealTimeLogProcessor:
     
     async def _add_alert(self, alert: StreamAlert) -> None:
         """Add a new alert"""
+        if len(self.alerts) == self.alerts.maxlen:
+            self.alerts_by_id.pop(self.alerts[0].id, None)
         self.alerts.append(alert)
-        
-        # Keep only recent alerts (last 100)
-        if len(self.alerts) > 100:
-            self.alerts = self.alerts[-100:]
+        self.alerts_by_id[alert.id] = alert
         
         await self._emit_event("alert_triggered", {
             "alert_id": alert.id,
@@ -291,13 +368,13 @@ class RealTimeLogProcessor:
             data=data
         )
         
-        # Notify all event handlers
-        for handler in self.event_handlers:
-            try:
-                await handler(event)
-            except Exception as e:
-                # Don't let handler errors break the processor
-                pass
+        # Notify all event handlers concurrently; a failing handler must
+        # not break the processor or hold up the others
+        if self.event_handlers:
+            await asyncio.gather(
+                *(handler(event) for handler in self.event_handlers),
+                return_exceptions=True
+            )
     
     def add_event_handler(self, handler: Callable) -> None:
         """Add an event handler"""
@@ -307,25 +384,42 @@ class RealTimeLogProcessor:
         """Get current metrics"""
         return self.metrics
     
-    def get_alerts(self, limit: int = 50) -> List[StreamAlert]:
-        """Get recent alerts"""
-        return self.alerts[-limit:] if self.alerts else []
+    def get_alert(self, alert_id: str) -> Optional[StreamAlert]:
+        """Get an alert by id"""
+        return self.alerts_by_id.get(alert_id)
+    
+    def get_alerts(self, limit: int = 50, offset: int = 0) -> List[StreamAlert]:
+        """Get recent alerts, skipping the `offset` newest ones"""
+        end = len(self.alerts) - offset
+        if end <= 0 or limit <= 0:
+            return []
+        return list(islice(self.alerts, max(end - limit, 0), end))
 
 
 class WebSocketStreamManager:
     """Manages WebSocket connections for real-time streaming"""
     
+    # Broadcast frames queued per connection before the oldest is dropped
+    MAX_PENDING_FRAMES = 256
+    # Seconds a single broadcast send may take before the client is dropped
+    SEND_TIMEOUT_SECONDS = 5.0
+    
     def __init__(self, processor: RealTimeLogProcessor):
         self.processor = processor
         self.active_connections: List[WebSocket] = []
         self._lock = asyncio.Lock()
+        self._outboxes: Dict[WebSocket, asyncio.Queue] = {}
+        self._writers: Dict[WebSocket, asyncio.Task] = {}
     
     async def connect(self, websocket: WebSocket) -> None:
         """Accept a new WebSocket connection"""
         await websocket.accept()
         
+        outbox = asyncio.Queue(maxsize=self.MAX_PENDING_FRAMES)
         async with self._lock:
             self.active_connections.append(websocket)
+            self._outboxes[websocket] = outbox
+            self._writers[websocket] = asyncio.create_task(self._writer(websocket, outbox))
             self.processor.metrics.active_connections = len(self.active_connections)
         
         await self._send_welcome_message(websocket)
@@ -336,84 +430,98 @@ class WebSocketStreamManager:
             if websocket in self.active_connections:
                 self.active_connections.remove(websocket)
                 self.processor.metrics.active_connections = len(self.active_connections)
+            self._outboxes.pop(websocket, None)
+            writer = self._writers.pop(websocket, None)
+        
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
     
     async def broadcast_event(self, event: StreamEvent) -> None:
-        """Broadcast event to all connected clients"""
-        if not self.active_connections:
+        """Broadcast event to all connected clients.
+        
+        The frame is encoded once and queued for each connection's writer
+        without awaiting any send, so a slow client never holds up the
+        processor or other clients. A client that falls MAX_PENDING_FRAMES
+        behind loses its oldest queued frames.
+        """
+        if not self._outboxes:
             return
         
-        message = {
+        frame = _encode_message({
             "type": "stream_event",
-            "event": event.dict()
-        }
+            "event": event.model_dump()
+        })
         
-        # Send to all connections
-        disconnected = []
-        async with self._lock:
-            for websocket in self.active_connections:
-                try:
-                    await websocket.send_text(json.dumps(message, default=str))
-                except Exception:
-                    disconnected.append(websocket)
-            
-            # Remove disconnected connections
-            for websocket in disconnected:
-                if websocket in self.active_connections:
-                    self.active_connections.remove(websocket)
-            
-            self.processor.metrics.active_connections = len(self.active_connections)
+        for outbox in list(self._outboxes.values()):
+            if outbox.full():
+                outbox.get_nowait()
+            outbox.put_nowait(frame)
+    
+    async def _writer(self, websocket: WebSocket, outbox: asyncio.Queue) -> None:
+        """Send queued frames to one client; drop the client on failure or timeout"""
+        try:
+            while True:
+                frame = await outbox.get()
+                await asyncio.wait_for(websocket.send_bytes(frame), timeout=self.SEND_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await self.disconnect(websocket)
     
     async def send_metrics(self, websocket: WebSocket) -> None:
         """Send current metrics to a specific client"""
         metrics = self.processor.get_metrics()
         message = {
             "type": "metrics",
-            "metrics": metrics.dict()
+            "metrics": metrics.model_dump()
         }
-        await websocket.send_text(json.dumps(message, default=str))
+        await websocket.send_bytes(_encode_message(message))
     
     async def send_alerts(self, websocket: WebSocket, limit: int = 10) -> None:
         """Send recent alerts to a specific client"""
         alerts = self.processor.get_alerts(limit)
         message = {
             "type": "alerts",
-            "alerts": [alert.dict() for alert in alerts]
+            "alerts": [alert.model_dump() for alert in alerts]
         }
-        await websocket.send_text(json.dumps(message, default=str))
+        await websocket.send_bytes(_encode_message(message))
     
     async def _send_welcome_message(self, websocket: WebSocket) -> None:
         """Send welcome message to new connection"""
-        welcome = {
-            "type": "welcome",
-            "message": "Connected to LipService Real-Time Stream",
-            "timestamp": datetime.utcnow().isoformat(),
-            "capabilities": [
-                "log_streaming",
-                "real_time_analysis",
-                "live_insights",
-                "adaptive_filtering",
-                "metrics_monitoring"
-            ]
-        }
-        await websocket.send_text(json.dumps(welcome, default=str))
+        # Aware, so it carries the same +00:00 offset as OPT_NAIVE_UTC frames
+        timestamp = datetime.now(UTC).isoformat().encode()
+        await websocket.send_bytes(_WELCOME_FRAME_PREFIX + b',"timestamp":"' + timestamp + b'"}')
 
 
 class KafkaStreamConsumer:
-    """Kafka consumer for high-throughput log ingestion"""
-    
-    def __init__(self, processor: RealTimeLogProcessor, kafka_config: Dict[str, Any] = None):
+    """Kafka consumer for high-throughput log ingestion
+    
+    Idle unless a kafka_config or a ready consumer is passed in. Records are
+    fetched with getmany() up to the processor's batch_size at a time and
+    handed to the buffer in one add_logs call, so a poll costs one round-trip
+    and one wake-up rather than one per record.
+    """
+    
+    DEFAULT_CONFIG = {
+        "bootstrap_servers": ["localhost:9092"],
+        "group_id": "lipservice-consumer",
+        "auto_offset_reset": "latest",
+        "topic": "lipservice-logs"
+    }
+    # How long one getmany() poll waits for records
+    POLL_TIMEOUT_MS = 100
+    
+    def __init__(self, processor: RealTimeLogProcessor, kafka_config: Dict[str, Any] = None, consumer: Any = None):
         self.processor = processor
-        self.kafka_config = kafka_config or {
-            "bootstrap_servers": ["localhost:9092"],
-            "group_id": "lipservice-consumer",
-            "auto_offset_reset": "latest"
-        }
+        self.kafka_config = {**self.DEFAULT_CONFIG, **(kafka_config or {})}
+        self.enabled = kafka_config is not None or consumer is not None
+        self._consumer = consumer
         self._running = False
         self._consumer_task: Optional[asyncio.Task] = None
     
     async def start(self) -> None:
         """Start Kafka consumer"""
-        if self._running:
+        if self._running or not self.enabled:
             return
         
         self._running = True
@@ -429,22 +537,44 @@ class KafkaStreamConsumer:
             except asyncio.CancelledError:
                 pass
     
+    def _create_consumer(self) -> Any:
+        """Build an aiokafka consumer from kafka_config (aiokafka is optional)"""
+        from aiokafka import AIOKafkaConsumer
+        
+        config = dict(self.kafka_config)
+        topic = config.pop("topic")
+        return AIOKafkaConsumer(topic, **config)
+    
     async def _consume_loop(self) -> None:
         """Main consumption loop"""
         try:
-            # Mock Kafka consumer (in production, use aiokafka)
+            consumer = self._consumer or self._create_consumer()
+            await consumer.start()
+        except Exception as e:
+            await self.processor._emit_event("kafka_error", {"error": str(e)})
+            return
+        
+        try:
             while self._running:
-                # Simulate receiving logs from Kafka
-                await asyncio.sleep(0.1)
+                records = await consumer.getmany(
+                    timeout_ms=self.POLL_TIMEOUT_MS,
+                    max_records=self.processor.config.batch_size
+                )
+                
+                logs = []
+                for messages in records.values():
+                    for message in messages:
+                        try:
+                            logs.append(LogEntry(**orjson.loads(message.value)))
+                        except Exception:
+                            self.processor.metrics.error_count += 1
                 
-                # In production, this would be:
-                # async for message in kafka_consumer:
-                #     log_data = json.loads(message.value)
-                #     log = LogEntry(**log_data)
-                #     await self.processor.add_log(log)
+                await self.processor.add_logs(logs)
                 
         except Exception as e:
             await self.processor._emit_event("kafka_error", {"error": str(e)})
+        finally:
+            await consumer.stop()
 
 
 class RealTimeStreamService:
@@ -488,7 +618,7 @@ class RealTimeStreamService:
             while True:
                 # Handle incoming messages
                 data = await websocket.receive_text()
-                message = json.loads(data)
+                message = orjson.loads(data)
                 
                 await self._handle_websocket_message(websocket, message)
                 
@@ -513,10 +643,14 @@ class RealTimeStreamService:
             if log_data:
                 log = LogEntry(**log_data)
                 await self.processor.add_log(log)
+        elif message_type == "add_logs":
+            # Add a batch of logs for processing
+            logs_data = message.get("logs") or []
+            await self.processor.add_logs([LogEntry(**log_data) for log_data in logs_data])
         elif message_type == "ping":
             # Respond to ping
             pong = {"type": "pong", "timestamp": datetime.utcnow().isoformat()}
-            await websocket.send_text(json.dumps(pong, default=str))
+            await websocket.send_bytes(_encode_message(pong))
     
     def get_processor(self) -> RealTimeLogProcessor:
         """Get the log processor"""
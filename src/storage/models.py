@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import JSON, Boolean, DateTime, Float, ForeignKey, Integer, String, Text, func
+from sqlalchemy import JSON, Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -11,6 +11,7 @@ class Base(DeclarativeBase):
 
 class Service(Base):
     __tablename__ = "services"
+    __table_args__ = (Index("ix_service_team_name", "team_id", "name", unique=True),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     team_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
@@ -30,10 +31,13 @@ class Service(Base):
 
 class Pattern(Base):
     __tablename__ = "patterns"
+    # Patterns are looked up by signature within a service; the leading
+    # service_id column also serves per-service scans.
+    __table_args__ = (Index("ix_pattern_service_signature", "service_id", "signature", unique=True),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    service_id: Mapped[int] = mapped_column(Integer, ForeignKey("services.id"), nullable=False, index=True)
-    signature: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    service_id: Mapped[int] = mapped_column(Integer, ForeignKey("services.id"), nullable=False)
+    signature: Mapped[str] = mapped_column(String(32), nullable=False)
     representative_message: Mapped[str] = mapped_column(Text, nullable=False)
     count: Mapped[int] = mapped_column(Integer, default=0)
     sampled_count: Mapped[int] = mapped_column(Integer, default=0)
@@ -51,6 +55,7 @@ class Pattern(Base):
 
 class Policy(Base):
     __tablename__ = "policies"
+    __table_args__ = (Index("ix_policy_active", "service_id", "is_active"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     service_id: Mapped[int] = mapped_column(Integer, ForeignKey("services.id"), nullable=False, index=True)
@@ -72,6 +77,10 @@ class Policy(Base):
         return f"<Policy(id={self.id}, service_id={self.service_id}, version={self.version}, active={self.is_active})>"
 
 
+# Serves the newest-first history scan (ORDER BY version DESC LIMIT n) from the index.
+Index("ix_policy_service_version", Policy.service_id, Policy.version.desc())
+
+
 class AnalysisRun(Base):
     __tablename__ = "analysis_runs"
 
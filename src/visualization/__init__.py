@@ -6,11 +6,12 @@ clustering, correlations, and real-time insights.
 """
 
 import asyncio
-import json
+import zlib
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel, Field
 
@@ -18,6 +19,26 @@ from src.intelligent_analysis import LogCluster, CorrelationPattern, LogInsight,
 from src.realtime_streaming import StreamMetrics, StreamAlert
 
 
+def _encode_default(obj: Any) -> Any:
+    """Fallback for types orjson does not serialize natively"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    return str(obj)
+
+
+def encode_frame(message: Any) -> bytes:
+    """Serialize a dashboard WebSocket message (or batch of messages) to a binary JSON frame.
+    
+    orjson handles datetimes, dataclasses and numpy values natively; naive
+    datetimes are tagged as UTC, matching the utcnow() timestamps used here.
+    """
+    return orjson.dumps(
+        message,
+        default=_encode_default,
+        option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+
+
 class VisualizationConfig(BaseModel):
     """Configuration for visualizations"""
     refresh_interval: float = Field(default=1.0, ge=0.1, le=60.0)
@@ -25,6 +46,8 @@ class VisualizationConfig(BaseModel):
     enable_animations: bool = Field(default=True)
     theme: str = Field(default="dark", pattern="^(dark|light)$")
     chart_types: List[str] = Field(default=["line", "bar", "scatter", "heatmap"])
+    # zlib-compress dashboard frames once before fan-out; clients must inflate them
+    compress_frames: bool = Field(default=False)
 
 
 class ClusterVisualization(BaseModel):
@@ -100,12 +123,24 @@ class VisualizationResponse(BaseModel):
 class DashboardManager:
     """Manages dashboard visualizations and real-time updates"""
     
+    # Most messages coalesced into one frame by a connection's writer
+    MAX_FRAME_BATCH = 128
+    # Replies queued per connection before new ones are dropped
+    MAX_PENDING_MESSAGES = 1000
+    # Cap on broadcast sends in flight at once
+    MAX_CONCURRENT_SENDS = 100
+    # Seconds a single broadcast send may take before the client is dropped
+    SEND_TIMEOUT_SECONDS = 5.0
+    
     def __init__(self, config: VisualizationConfig = None):
         self.config = config or VisualizationConfig()
         self.active_connections: List[WebSocket] = []
         self._lock = asyncio.Lock()
         self._update_task: Optional[asyncio.Task] = None
         self._running = False
+        self._outboxes: Dict[WebSocket, asyncio.Queue] = {}
+        self._writers: Dict[WebSocket, asyncio.Task] = {}
+        self._send_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_SENDS)
     
     async def start(self) -> None:
         """Start the dashboard manager"""
@@ -129,8 +164,11 @@ class DashboardManager:
         """Connect a new dashboard client"""
         await websocket.accept()
         
+        outbox = asyncio.Queue(maxsize=self.MAX_PENDING_MESSAGES)
         async with self._lock:
             self.active_connections.append(websocket)
+            self._outboxes[websocket] = outbox
+            self._writers[websocket] = asyncio.create_task(self._writer(websocket, outbox))
         
         await self._send_welcome_message(websocket)
     
@@ -139,6 +177,45 @@ class DashboardManager:
         async with self._lock:
             if websocket in self.active_connections:
                 self.active_connections.remove(websocket)
+            self._outboxes.pop(websocket, None)
+            writer = self._writers.pop(websocket, None)
+        
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+    
+    def enqueue(self, websocket: WebSocket, message: Dict[str, Any]) -> bool:
+        """Queue a reply for a client; returns False if it was dropped"""
+        outbox = self._outboxes.get(websocket)
+        if outbox is None:
+            return False
+        
+        try:
+            outbox.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+    
+    async def _writer(self, websocket: WebSocket, outbox: asyncio.Queue) -> None:
+        """Send queued replies, coalescing a burst into one frame.
+        
+        Replies always go out wrapped in a ``{"type": "batch", "messages": [...]}``
+        envelope, whether one or several were waiting, so clients dispatch
+        every frame on its ``type`` without checking its shape.
+        """
+        try:
+            while True:
+                batch = [await outbox.get()]
+                while len(batch) < self.MAX_FRAME_BATCH:
+                    try:
+                        batch.append(outbox.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                
+                await websocket.send_bytes(self._encode({"type": "batch", "messages": batch}))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await self.disconnect(websocket)
     
     async def _update_loop(self) -> None:
         """Main update loop for real-time dashboard updates"""
@@ -161,23 +238,47 @@ class DashboardManager:
         # Generate update data
         update_data = {
             "type": "dashboard_update",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.utcnow(),
             "data": await self._generate_dashboard_data()
         }
         
-        # Send to all connections
-        disconnected = []
-        async with self._lock:
-            for websocket in self.active_connections:
+        await self._broadcast(update_data)
+    
+    async def _broadcast(self, message: Dict[str, Any]) -> None:
+        """Send a message to all connected clients concurrently.
+        
+        The frame is encoded (and compressed) once; clients whose send fails
+        or times out are disconnected.
+        """
+        frame = self._encode(message)
+        
+        async def safe_send(websocket: WebSocket) -> Tuple[WebSocket, bool]:
+            async with self._send_semaphore:
                 try:
-                    await websocket.send_text(json.dumps(update_data, default=str))
-                except Exception:
-                    disconnected.append(websocket)
-            
-            # Remove disconnected connections
-            for websocket in disconnected:
-                if websocket in self.active_connections:
-                    self.active_connections.remove(websocket)
+                    await asyncio.wait_for(websocket.send_bytes(frame), timeout=self.SEND_TIMEOUT_SECONDS)
+                    return websocket, True
+                except (WebSocketDisconnect, asyncio.TimeoutError, RuntimeError):
+                    return websocket, False
+        
+        connections = list(self.active_connections)
+        results = await asyncio.gather(*[safe_send(ws) for ws in connections], return_exceptions=True)
+        
+        for websocket, result in zip(connections, results):
+            if isinstance(result, BaseException) or not result[1]:
+                await self.disconnect(websocket)
+    
+    def _encode(self, message: Any) -> bytes:
+        """Encode a frame, zlib-compressing it when compress_frames is enabled.
+        
+        Compression happens once per frame rather than per connection; pair it
+        with permessage-deflate disabled on the server (uvicorn
+        --ws-per-message-deflate false) so frames are not deflated twice.
+        The welcome frame is never compressed since it announces the setting.
+        """
+        frame = encode_frame(message)
+        if self.config.compress_frames:
+            return zlib.compress(frame, 1)
+        return frame
     
     async def _generate_dashboard_data(self) -> Dict[str, Any]:
         """Generate comprehensive dashboard data"""
@@ -337,7 +438,7 @@ class DashboardManager:
         welcome = {
             "type": "dashboard_welcome",
             "message": "Connected to LipService Dashboard",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.utcnow(),
             "capabilities": [
                 "real_time_metrics",
                 "cluster_visualization", 
@@ -345,9 +446,9 @@ class DashboardManager:
                 "insights_dashboard",
                 "alerts_monitoring"
             ],
-            "config": self.config.dict()
+            "config": self.config.model_dump()
         }
-        await websocket.send_text(json.dumps(welcome, default=str))
+        await websocket.send_bytes(encode_frame(welcome))
 
 
 class ClusterVisualizer:
@@ -0,0 +1,17 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.orm import sessionmaker
+
+from src.integrations.analysis_service import AnalysisService
+from src.storage.models import Service
+
+
+def test_start_run_creates_service_once(db_session):
+    service = AnalysisService(MagicMock(), session_factory=sessionmaker(bind=db_session.connection()))
+
+    first_service_id, first_run_id = service._start_run(123, "new-api")
+    second_service_id, second_run_id = service._start_run(123, "new-api")
+
+    assert first_service_id == second_service_id
+    assert first_run_id != second_run_id
+    assert db_session.query(Service).filter(Service.team_id == 123, Service.name == "new-api").count() == 1
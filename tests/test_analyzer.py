@@ -100,6 +100,22 @@ def test_analyzer_calculates_error_rate():
     assert result.summary["error_rate"] == 0.1
 
 
+def test_analyzer_error_rate_includes_critical():
+    analyzer = LogAnalyzer()
+    now = datetime.now()
+
+    logs = [
+        LogEntry("Error", "ERROR", now, "api"),
+        LogEntry("Crash", "CRITICAL", now, "api"),
+        LogEntry("Info", "INFO", now, "api"),
+        LogEntry("Info", "INFO", now, "api"),
+    ]
+
+    result = analyzer.analyze(logs)
+
+    assert result.summary["error_rate"] == 0.5
+
+
 def test_analyzer_handles_empty_logs():
     analyzer = LogAnalyzer()
     result = analyzer.analyze([])
@@ -81,6 +81,28 @@ def test_zscore_detection_with_insufficient_data():
     assert anomaly is None
 
 
+def test_running_zscore_matches_batch_zscore():
+    values = [8.0, 12.0, 9.0, 11.0, 10.0, 10.5, 9.5]
+    detector = AnomalyDetector()
+    for value in values:
+        detector.add_sample(value)
+
+    batch = detector.detect_with_zscore(values, 20.0)
+    running = detector.detect_with_running_zscore(20.0)
+
+    assert running is not None
+    assert running.baseline_value == pytest.approx(batch.baseline_value)
+    assert running.confidence == pytest.approx(batch.confidence)
+    assert detector.detect_with_running_zscore(10.0) is None
+
+
+def test_running_zscore_with_insufficient_data():
+    detector = AnomalyDetector()
+    detector.add_sample(10.0)
+
+    assert detector.detect_with_running_zscore(20.0) is None
+
+
 def test_zscore_detection_with_zero_variance():
     detector = AnomalyDetector()
     values = [10.0] * 100
@@ -144,6 +166,18 @@ def test_get_current_rate():
     assert rate <= 50 / 10
 
 
+def test_get_current_rate_ignores_expired_timestamps():
+    detector = AnomalyDetector(window_size=10)
+    now = time.time()
+
+    for i in range(5):
+        detector.update_rate_window(now - 100 - i)
+    for i in range(3):
+        detector.update_rate_window(now - i)
+
+    assert detector.get_current_rate(window_seconds=10) == 3 / 10
+
+
 def test_get_current_rate_with_insufficient_data():
     detector = AnomalyDetector()
     rate = detector.get_current_rate()
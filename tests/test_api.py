@@ -6,6 +6,13 @@ from src.main import app
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def app_lifespan():
+    # Routers are mounted in the app lifespan, which only runs inside the client context
+    with client:
+        yield
+
+
 def test_health_endpoint_returns_healthy_status():
     response = client.get("/health")
 
@@ -27,6 +27,13 @@ app.dependency_overrides[get_db] = override_get_db
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def app_lifespan():
+    # Routers are mounted in the app lifespan, which only runs inside the client context
+    with client:
+        yield
+
+
 @pytest.fixture(autouse=True)
 def setup_teardown_db():
     Base.metadata.create_all(bind=engine)
@@ -100,6 +107,31 @@ def test_receive_pattern_stats_creates_analysis_run():
     db.close()
 
 
+def test_receive_pattern_stats_reuses_service_created_by_earlier_upload():
+    now = time.time()
+    payload = {
+        "service_name": "repeat-api",
+        "team_id": 123,
+        "timestamp": now,
+        "patterns": [],
+        "total_logs": 100,
+        "unique_patterns": 5,
+    }
+
+    first = client.post("/api/v1/patterns/stats", json=payload)
+    second = client.post("/api/v1/patterns/stats", json=payload)
+
+    assert first.status_code == 202
+    assert second.status_code == 202
+
+    db = TestSessionLocal()
+    assert db.query(Service).filter(Service.name == "repeat-api").count() == 1
+    runs = db.query(AnalysisRun).all()
+    assert len(runs) == 2
+    assert runs[0].service_id == runs[1].service_id
+    db.close()
+
+
 @pytest.mark.parametrize(
     "total_logs,unique_patterns",
     [
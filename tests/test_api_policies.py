@@ -1,7 +1,11 @@
+import json
+
+import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from src.api.policies import clear_policy_cache, invalidate_policy_cache
 from src.main import app
 from src.storage.database import get_db
 from src.storage.models import Base, Policy, Service
@@ -24,8 +28,16 @@ app.dependency_overrides[get_db] = override_get_db
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def app_lifespan():
+    # Routers are mounted in the app lifespan, which only runs inside the client context
+    with client:
+        yield
+
+
 def setup_function():
     Base.metadata.create_all(bind=engine)
+    clear_policy_cache()
 
 
 def teardown_function():
@@ -86,6 +98,42 @@ def test_get_policy_returns_active_policy():
     assert data["version"] == 1
 
 
+def test_get_policy_is_cached_until_invalidated():
+    db = TestSessionLocal()
+    service = Service(team_id=123, name="test-api")
+    db.add(service)
+    db.commit()
+    service_id = service.id
+    db.close()
+
+    response = client.get("/api/v1/policies/test-api?team_id=123")
+    assert response.json()["generated_by"] == "default"
+
+    db = TestSessionLocal()
+    db.add(
+        Policy(
+            service_id=service_id,
+            version=1,
+            global_rate=0.5,
+            severity_rates={"ERROR": 1.0},
+            pattern_rates={},
+            generated_by="llm",
+            is_active=True,
+        )
+    )
+    db.commit()
+    db.close()
+
+    response = client.get("/api/v1/policies/test-api?team_id=123")
+    assert response.json()["generated_by"] == "default"
+
+    invalidate_policy_cache(123, "test-api")
+
+    response = client.get("/api/v1/policies/test-api?team_id=123")
+    assert response.json()["generated_by"] == "llm"
+    assert response.json()["version"] == 1
+
+
 def test_get_policy_for_nonexistent_service_returns_404():
     response = client.get("/api/v1/policies/nonexistent-service?team_id=123")
 
@@ -156,3 +204,63 @@ def test_policy_history_respects_limit():
     data = response.json()
     assert len(data) == 3
     assert data[0]["version"] == 5
+
+
+def test_policy_history_offset_and_limit_bounds():
+    db = TestSessionLocal()
+    service = Service(team_id=123, name="test-api")
+    db.add(service)
+    db.commit()
+
+    for i in range(5):
+        db.add(
+            Policy(
+                service_id=service.id,
+                version=i + 1,
+                global_rate=1.0,
+                severity_rates={"ERROR": 1.0},
+                pattern_rates={},
+                generated_by="llm",
+                is_active=(i == 4),
+            )
+        )
+    db.commit()
+    db.close()
+
+    response = client.get("/api/v1/policies/test-api/history?team_id=123&limit=2&offset=2")
+
+    assert response.status_code == 200
+    assert [p["version"] for p in response.json()] == [3, 2]
+
+    response = client.get("/api/v1/policies/test-api/history?team_id=123&limit=500")
+
+    assert response.status_code == 422
+
+
+def test_policy_history_streams_ndjson():
+    db = TestSessionLocal()
+    service = Service(team_id=123, name="test-api")
+    db.add(service)
+    db.commit()
+
+    for i in range(3):
+        db.add(
+            Policy(
+                service_id=service.id,
+                version=i + 1,
+                global_rate=1.0,
+                severity_rates={"ERROR": 1.0},
+                pattern_rates={},
+                generated_by="llm",
+                is_active=(i == 2),
+            )
+        )
+    db.commit()
+    db.close()
+
+    response = client.get("/api/v1/policies/test-api/history?team_id=123", headers={"Accept": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["version"] for line in lines] == [3, 2, 1]
@@ -25,6 +25,13 @@ app.dependency_overrides[get_db] = override_get_db
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def app_lifespan():
+    # Routers are mounted in the app lifespan, which only runs inside the client context
+    with client:
+        yield
+
+
 @pytest.fixture(autouse=True)
 def setup_teardown_db():
     Base.metadata.create_all(bind=engine)
@@ -46,6 +53,15 @@ def test_create_service():
     assert "id" in data
 
 
+def test_create_duplicate_service_returns_409():
+    client.post("/api/v1/services/", json={"team_id": 123, "name": "my-api"})
+
+    response = client.post("/api/v1/services/", json={"team_id": 123, "name": "my-api"})
+
+    assert response.status_code == 409
+    assert "already exists" in response.json()["detail"]
+
+
 def test_get_service():
     create_response = client.post(
         "/api/v1/services/",
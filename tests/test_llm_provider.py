@@ -1,6 +1,12 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import orjson
 import pytest
 
-from src.engine.llm_provider import RuleBasedProvider
+from src.engine import llm_provider
+from src.engine.llm_provider import AnthropicProvider, AsyncRateLimiter, OpenAIProvider, RuleBasedProvider
 
 
 @pytest.mark.asyncio
@@ -31,6 +37,11 @@ def test_rule_based_provider_model_name():
     assert provider.get_model_name() == "rule-based"
 
 
+def test_sdk_providers_report_configured_model():
+    assert OpenAIProvider(api_key="test", model="gpt-4o-mini").get_model_name() == "gpt-4o-mini"
+    assert AnthropicProvider(api_key="test").get_model_name() == "claude-3-5-sonnet-20241022"
+
+
 @pytest.mark.asyncio
 async def test_rule_based_provider_is_deterministic():
     provider = RuleBasedProvider()
@@ -42,3 +53,77 @@ async def test_rule_based_provider_is_deterministic():
     assert policy1.severity_rates == policy2.severity_rates
     assert policy1.anomaly_boost == policy2.anomaly_boost
 
+
+@pytest.mark.asyncio
+async def test_anthropic_provider_parses_fenced_json():
+    provider = AnthropicProvider(api_key="test")
+    reply = 'Here is the policy:\n```json\n{"global_rate": 0.4, "severity_rates": {"INFO": 0.1}}\n```'
+    provider.client.messages.create = AsyncMock(return_value=SimpleNamespace(content=[SimpleNamespace(text=reply)]))
+
+    policy = await provider.generate_policy("Test prompt")
+
+    assert policy.global_rate == 0.4
+    assert policy.severity_rates == {"INFO": 0.1, "ERROR": 1.0, "CRITICAL": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_rule_based_provider_batch_returns_one_policy_per_prompt():
+    provider = RuleBasedProvider()
+
+    policies = await provider.generate_policies_batch(["a", "b", "c"])
+
+    assert len(policies) == 3
+    assert all(p.model == "rule-based" for p in policies)
+
+
+@pytest.mark.asyncio
+async def test_openai_provider_batch_maps_results_by_custom_id(monkeypatch):
+    monkeypatch.setattr(llm_provider, "BATCH_POLL_INTERVAL_SECONDS", 0)
+    provider = OpenAIProvider(api_key="test")
+    policy_json = orjson.dumps({"global_rate": 0.3, "severity_rates": {}}).decode()
+    output = b"\n".join(
+        [
+            orjson.dumps({"custom_id": "1", "response": {"status_code": 500, "body": {}}, "error": "boom"}),
+            orjson.dumps(
+                {
+                    "custom_id": "0",
+                    "response": {"status_code": 200, "body": {"choices": [{"message": {"content": policy_json}}]}},
+                }
+            ),
+        ]
+    )
+    provider.client.files.create = AsyncMock(return_value=SimpleNamespace(id="file-in"))
+    provider.client.batches.create = AsyncMock(return_value=SimpleNamespace(id="batch", status="in_progress"))
+    provider.client.batches.retrieve = AsyncMock(
+        return_value=SimpleNamespace(id="batch", status="completed", output_file_id="file-out")
+    )
+    provider.client.files.content = AsyncMock(return_value=SimpleNamespace(content=output))
+
+    results = await provider.generate_policies_batch(["first", "second"])
+
+    assert results[0].global_rate == 0.3
+    assert results[0].severity_rates == {"ERROR": 1.0, "CRITICAL": 1.0}
+    assert isinstance(results[1], RuntimeError)
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_delays_calls_beyond_the_burst():
+    limiter = AsyncRateLimiter(max_rate=2, time_period=0.2)
+
+    start = time.monotonic()
+    for _ in range(3):
+        async with limiter:
+            pass
+
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_close_http_client_releases_shared_pool():
+    pool = llm_provider._http_client()
+
+    await llm_provider.close_http_client()
+
+    assert pool.is_closed
+    assert llm_provider._http_client() is not pool
+    await llm_provider.close_http_client()
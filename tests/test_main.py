@@ -0,0 +1,64 @@
+import sys
+import importlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def load_main(monkeypatch):
+    def load(features: str):
+        monkeypatch.setenv("LIPSERVICE_FEATURES", features)
+        sys.modules.pop("src.main", None)
+        return importlib.import_module("src.main")
+
+    yield load
+    sys.modules.pop("src.main", None)
+
+
+def test_only_enabled_feature_routers_are_mounted(load_main):
+    main = load_main("core")
+
+    with TestClient(main.app) as client:
+        paths = client.get("/openapi.json").json()["paths"]
+        assert client.get("/health").json() == {"status": "healthy"}
+
+    assert "/api/v1/pipeline/generate-policy" in paths
+    assert not any(path.startswith("/api/v1/visualization") for path in paths)
+    assert not any(path.startswith("/api/v1/realtime") for path in paths)
+
+
+def test_unknown_feature_is_rejected(load_main):
+    with pytest.raises(ValueError, match="bogus"):
+        load_main("core,bogus")
+
+
+def test_root_supports_conditional_requests(load_main):
+    main = load_main("core")
+
+    with TestClient(main.app) as client:
+        first = client.get("/")
+        revalidated = client.get("/", headers={"If-None-Match": first.headers["etag"]})
+        health = client.get("/health")
+
+    assert first.json()["name"] == "LipService"
+    assert "max-age" in first.headers["cache-control"]
+    assert revalidated.status_code == 304
+    assert health.headers["cache-control"] == "max-age=1"
+
+
+def test_shutdown_closes_shared_http_pools(load_main):
+    from src.engine import llm_provider
+    from src.integrations import posthog_client
+
+    main = load_main("core")
+
+    with TestClient(main.app):
+        llm_pool = llm_provider._http_client()
+        posthog_pool = posthog_client._http_client()
+
+    assert llm_pool.is_closed
+    assert posthog_pool.is_closed
+    # A restarted app gets fresh pools rather than the closed ones
+    assert llm_provider._http_client() is not llm_pool
+    assert posthog_client._http_client() is not posthog_pool
@@ -1,6 +1,7 @@
 from datetime import datetime
 
 import pytest
+from sqlalchemy.exc import IntegrityError
 
 from src.storage.models import AnalysisRun, Pattern, Policy, Service
 
@@ -62,6 +63,29 @@ def test_pattern_creation(db_session):
     assert pattern.severity_distribution["ERROR"] == 10
 
 
+def test_pattern_signature_is_unique_per_service(db_session):
+    api = Service(team_id=123, name="test-api")
+    worker = Service(team_id=123, name="test-worker")
+    db_session.add_all([api, worker])
+    db_session.commit()
+
+    def pattern(service_id: int) -> Pattern:
+        return Pattern(
+            service_id=service_id,
+            signature="abc123",
+            representative_message="User logged in",
+            first_seen=datetime.now(),
+            last_seen=datetime.now(),
+        )
+
+    db_session.add_all([pattern(api.id), pattern(worker.id)])
+    db_session.commit()
+
+    db_session.add(pattern(api.id))
+    with pytest.raises(IntegrityError):
+        db_session.commit()
+
+
 @pytest.mark.parametrize(
     "global_rate,severity_rates,expected_generated_by",
     [
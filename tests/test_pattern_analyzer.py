@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 
 import pytest
 
-from src.engine.pattern_analyzer import LogEntry, PatternAnalyzer
+from src.engine.pattern_analyzer import LogBatch, LogEntry, PatternAnalyzer
 
 
 @pytest.fixture
@@ -121,3 +121,30 @@ def test_clusters_sorted_by_count_descending():
         for i in range(len(analysis.clusters) - 1):
             assert analysis.clusters[i].total_count >= analysis.clusters[i + 1].total_count
 
+
+
+def test_small_pattern_sets_group_by_token_overlap():
+    now = datetime.now()
+    logs = [
+        LogEntry("Database connection failed", "ERROR", now, "api"),
+        LogEntry("Database connection timeout", "ERROR", now, "api"),
+        LogEntry("Cache warmed", "INFO", now, "api"),
+    ]
+
+    analyzer = PatternAnalyzer()
+    analysis = analyzer.analyze(logs)
+
+    database = [c for c in analysis.clusters if c.cluster_id != -1]
+    assert len(database) == 1
+    assert database[0].size == 2
+    assert analysis.noise_count == 1
+
+
+def test_analyzer_accepts_columnar_batch(sample_logs):
+    analyzer = PatternAnalyzer()
+
+    from_entries = analyzer.analyze(sample_logs)
+    from_batch = analyzer.analyze(LogBatch.from_entries(sample_logs))
+
+    assert from_batch.total_logs == len(sample_logs)
+    assert from_batch == from_entries
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.engine.analyzer import AnalysisResult, PatternAnalysis
+from src.engine.anomaly_detector import Anomaly
+from src.engine.llm_provider import PolicyResponse
+from src.engine.policy_cache import PolicyCache
+
+
+def _analysis(total_logs: int = 1000, detected_at: datetime | None = None) -> AnalysisResult:
+    anomaly = Anomaly(
+        pattern_signature="error_rate",
+        anomaly_type="error_surge",
+        severity="high",
+        current_value=0.25,
+        baseline_value=0.05,
+        confidence=1.0,
+        detected_at=detected_at or datetime.now(),
+        message="High error rate: 25.0% of logs are errors",
+    )
+    summary = {
+        "total_logs": total_logs,
+        "unique_patterns": 2,
+        "severity_distribution": {"INFO": 750, "ERROR": 250},
+        "top_patterns": [{"message": "User logged in", "count": 750, "signature": "abc123"}],
+    }
+    return AnalysisResult(pattern_analysis=PatternAnalysis([], 0, 2, total_logs), anomalies=[anomaly], summary=summary)
+
+
+@pytest.fixture
+def policy():
+    return PolicyResponse(
+        global_rate=0.5,
+        severity_rates={"INFO": 0.1, "ERROR": 1.0},
+        pattern_rates={"abc123": 0.05},
+        anomaly_boost=3.0,
+        reasoning="cached",
+        model="gpt-4o",
+    )
+
+
+def test_make_key_ignores_anomaly_detection_time():
+    now = datetime.now()
+
+    key_a = PolicyCache.make_key("openai", "api", _analysis(detected_at=now), None)
+    key_b = PolicyCache.make_key("openai", "api", _analysis(detected_at=now + timedelta(minutes=5)), None)
+
+    assert key_a == key_b
+
+
+def test_make_key_changes_with_inputs():
+    base = PolicyCache.make_key("openai", "api", _analysis(), None)
+
+    assert PolicyCache.make_key("anthropic", "api", _analysis(), None) != base
+    assert PolicyCache.make_key("openai", "web", _analysis(), None) != base
+    assert PolicyCache.make_key("openai", "api", _analysis(total_logs=2000), None) != base
+    assert PolicyCache.make_key("openai", "api", _analysis(), 10.0) != base
+
+
+async def test_get_returns_stored_policy(policy):
+    cache = PolicyCache()
+    key = PolicyCache.make_key("openai", "api", _analysis(), None)
+
+    assert await cache.get(key) is None
+
+    await cache.set(key, policy)
+
+    assert await cache.get(key) == policy
+
+
+async def test_backend_errors_are_treated_as_misses(policy):
+    class BrokenBackend:
+        async def get(self, key):
+            raise ConnectionError("down")
+
+        async def set(self, key, value, ttl):
+            raise ConnectionError("down")
+
+    cache = PolicyCache(backend=BrokenBackend())
+
+    await cache.set("key", policy)
+    assert await cache.get("key") is None
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 
 import pytest
@@ -136,6 +137,25 @@ async def test_policy_validation_fixes_invalid_rates(sample_analysis):
         assert 0.0 <= rate <= 1.0, f"Invalid rate for {severity}: {rate}"
 
 
+def test_validate_and_fix_policy_clamps_out_of_range_values():
+    generator = PolicyGenerator(RuleBasedProvider())
+    policy = PolicyResponse(
+        global_rate=1.7,
+        severity_rates={"INFO": 0.2, "ERROR": 0.1},
+        pattern_rates={"low": -0.3, "ok": 0.4, "high": 2.0},
+        anomaly_boost=0.5,
+        reasoning="",
+        model="test",
+    )
+
+    fixed = generator._validate_and_fix_policy(policy)
+
+    assert fixed.global_rate == 1.0
+    assert fixed.anomaly_boost == 1.0
+    assert fixed.severity_rates == {"INFO": 0.2, "ERROR": 1.0, "CRITICAL": 1.0}
+    assert fixed.pattern_rates == {"low": 0.0, "ok": 0.4, "high": 1.0}
+
+
 def test_prompt_building_includes_key_info(sample_analysis):
     """Test that prompt includes essential analysis information."""
     provider = RuleBasedProvider()
@@ -160,3 +180,46 @@ def test_prompt_includes_cost_target_when_provided(sample_analysis):
     assert "Cost Target:" in prompt_with_cost
     assert "No specific target" in prompt_without_cost or "optimize for value" in prompt_without_cost.lower()
 
+
+@pytest.mark.asyncio
+async def test_generate_policies_runs_jobs_concurrently(sample_analysis):
+    class SlowProvider(RuleBasedProvider):
+        in_flight = 0
+        peak = 0
+
+        async def generate_policy(self, prompt):
+            SlowProvider.in_flight += 1
+            SlowProvider.peak = max(SlowProvider.peak, SlowProvider.in_flight)
+            await asyncio.sleep(0.01)
+            SlowProvider.in_flight -= 1
+            if "Service: broken" in prompt:
+                raise RuntimeError("provider down")
+            return await super().generate_policy(prompt)
+
+    generator = PolicyGenerator(SlowProvider())
+    jobs = [(name, sample_analysis, None) for name in ("api", "web", "broken", "worker")]
+
+    results = await generator.generate_policies(jobs, max_concurrency=2)
+
+    assert SlowProvider.peak == 2
+    assert isinstance(results[2], RuntimeError)
+    assert [r.severity_rates["ERROR"] for i, r in enumerate(results) if i != 2] == [1.0, 1.0, 1.0]
+
+
+@pytest.mark.asyncio
+async def test_generate_policy_reuses_cached_policy_for_same_prompt(sample_analysis):
+    class CountingProvider(RuleBasedProvider):
+        calls = 0
+
+        async def generate_policy(self, prompt):
+            CountingProvider.calls += 1
+            return await super().generate_policy(prompt)
+
+    generator = PolicyGenerator(CountingProvider())
+
+    first = await generator.generate_policy("api", sample_analysis)
+    second = await generator.generate_policy("api", sample_analysis)
+    await generator.generate_policy("web", sample_analysis)
+
+    assert second is first
+    assert CountingProvider.calls == 2
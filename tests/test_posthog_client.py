@@ -1,9 +1,12 @@
-from datetime import datetime
+from datetime import UTC, datetime
 from unittest.mock import MagicMock, patch
 
+import httpx
+import orjson
 import pytest
 
-from src.integrations.posthog_client import PostHogLogsClient
+from src.integrations import posthog_client as posthog_module
+from src.integrations.posthog_client import ApiLogsClient, ClickHouseLogsClient, PostHogLogsClient
 
 
 @pytest.fixture
@@ -13,9 +16,16 @@ def mock_clickhouse_client():
     return client
 
 
+@pytest.fixture(autouse=True)
+def clear_lookup_caches():
+    """Module-level lookup caches would otherwise leak results between tests."""
+    posthog_module._services_cache.clear()
+    posthog_module._volume_cache.clear()
+
+
 @pytest.mark.asyncio
 async def test_fetch_logs_from_clickhouse(mock_clickhouse_client):
-    mock_clickhouse_client.execute.return_value = [
+    mock_clickhouse_client.execute_iter.return_value = [
         ("User logged in", "INFO", datetime.now(), "api"),
         ("Payment processed", "INFO", datetime.now(), "api"),
         ("Error occurred", "ERROR", datetime.now(), "api"),
@@ -32,87 +42,205 @@ async def test_fetch_logs_from_clickhouse(mock_clickhouse_client):
     assert logs[2].severity == "ERROR"
 
 
+@pytest.mark.asyncio
+async def test_fetch_logs_columnar_fills_defaults(mock_clickhouse_client):
+    now = datetime.now()
+    mock_clickhouse_client.execute_iter.return_value = [
+        ("User logged in", "INFO", now, "api"),
+        (None, None, now, None),
+    ]
+
+    posthog_client = PostHogLogsClient(clickhouse_host="localhost")
+    posthog_client.clickhouse_client = mock_clickhouse_client
+
+    batch = await posthog_client.fetch_logs_columnar(team_id=123, service_name="api")
+
+    assert batch.messages == ["User logged in", ""]
+    assert batch.severities == ["INFO", "INFO"]
+    assert batch.timestamps == [now, now]
+    assert batch.service_names == ["api", "unknown"]
+
+
 @pytest.mark.asyncio
 async def test_fetch_logs_builds_correct_query(mock_clickhouse_client):
-    mock_clickhouse_client.execute.return_value = []
+    mock_clickhouse_client.execute_iter.return_value = []
 
     posthog_client = PostHogLogsClient(clickhouse_host="localhost")
     posthog_client.clickhouse_client = mock_clickhouse_client
 
     await posthog_client.fetch_logs(team_id=123, service_name="test-api", hours=2, limit=500)
 
-    executed_query = mock_clickhouse_client.execute.call_args[0][0]
+    executed_query, params = mock_clickhouse_client.execute_iter.call_args[0]
 
-    assert "team_id = 123" in executed_query
-    assert "service_name = 'test-api'" in executed_query
-    assert "INTERVAL 2 HOUR" in executed_query
-    assert "LIMIT 500" in executed_query
+    assert "PREWHERE team_id = %(team_id)s" in executed_query
+    assert "service_name = %(service_name)s" in executed_query
+    assert "INTERVAL %(hours)s HOUR" in executed_query
+    assert "LIMIT %(limit)s" in executed_query
+    assert params == {"team_id": 123, "service_name": "test-api", "hours": 2, "limit": 500}
 
 
 @pytest.mark.asyncio
 async def test_fetch_logs_without_service_filter(mock_clickhouse_client):
-    mock_clickhouse_client.execute.return_value = []
+    mock_clickhouse_client.execute_iter.return_value = []
 
     posthog_client = PostHogLogsClient(clickhouse_host="localhost")
     posthog_client.clickhouse_client = mock_clickhouse_client
 
     await posthog_client.fetch_logs(team_id=123, service_name=None, hours=1)
 
-    executed_query = mock_clickhouse_client.execute.call_args[0][0]
+    executed_query, params = mock_clickhouse_client.execute_iter.call_args[0]
+
+    assert "service_name =" not in executed_query
+    assert "service_name" not in params
+
+
+def test_client_requires_credentials():
+    with pytest.raises(ValueError, match="credentials required"):
+        PostHogLogsClient()
 
-    assert "service_name" not in executed_query
+
+def test_client_picks_implementation_at_construction():
+    clickhouse = PostHogLogsClient(clickhouse_host="localhost")
+    api = PostHogLogsClient(api_url="https://posthog.example", api_key="key")
+
+    assert isinstance(clickhouse, ClickHouseLogsClient)
+    assert isinstance(api, ApiLogsClient)
+    assert isinstance(api, PostHogLogsClient)
+    assert not hasattr(api, "get_log_volume")
 
 
 @pytest.mark.asyncio
-async def test_fetch_logs_requires_credentials():
-    posthog_client = PostHogLogsClient()
+async def test_fetch_logs_from_api_reuses_shared_http_client(monkeypatch):
+    requests = []
 
-    with pytest.raises(ValueError, match="credentials required"):
-        await posthog_client.fetch_logs(team_id=123)
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(
+            200,
+            json={"results": [["User logged in", "INFO", "2024-01-01T00:00:00", "api"]]},
+        )
+
+    shared = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(posthog_module, "_http_client", lambda: shared)
+    posthog_client = PostHogLogsClient(api_url="https://posthog.example", api_key="key")
+
+    first = await posthog_client.fetch_logs(team_id=123, service_name="api")
+    second = await posthog_client.fetch_logs(team_id=123, service_name="api")
+
+    assert first[0].message == second[0].message == "User logged in"
+    assert len(requests) == 2
+    assert requests[0].headers["Authorization"] == "Bearer key"
+    assert not shared.is_closed
+    await shared.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fetch_logs_from_api_splits_window_into_concurrent_requests(monkeypatch):
+    queries = []
+
+    def handler(request):
+        queries.append(orjson.loads(request.content)["query"])
+        return httpx.Response(200, json={"results": []})
+
+    shared = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(posthog_module, "_http_client", lambda: shared)
+    posthog_client = PostHogLogsClient(api_url="https://posthog.example", api_key="key")
+
+    await posthog_client.fetch_logs(team_id=123, hours=3, limit=1000)
+
+    assert len(queries) == 3
+    assert sum(q["values"]["limit"] for q in queries) == 1000
+    assert len({q["values"]["date_from"] for q in queries}) == 3
+    await shared.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fetch_logs_from_api_parses_utc_z_timestamps(monkeypatch):
+    def handler(request):
+        return httpx.Response(200, json={"results": [["ok", "INFO", "2024-01-01T10:00:00.123456Z", "api"]]})
 
+    shared = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(posthog_module, "_http_client", lambda: shared)
+    posthog_client = PostHogLogsClient(api_url="https://posthog.example", api_key="key")
 
-def test_get_log_volume(mock_clickhouse_client):
+    logs = await posthog_client.fetch_logs(team_id=123)
+
+    assert logs[0].timestamp == datetime(2024, 1, 1, 10, 0, 0, 123456, tzinfo=UTC)
+    await shared.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fetch_logs_from_api_sends_projected_hogql_query(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"results": [["ok", None, "2024-01-01T10:00:00Z", None]]})
+
+    shared = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(posthog_module, "_http_client", lambda: shared)
+    posthog_client = PostHogLogsClient(api_url="https://posthog.example", api_key="key")
+
+    logs = await posthog_client.fetch_logs(team_id=123, service_name="api' OR 1=1 --", limit=10)
+
+    query = orjson.loads(requests[0].content)["query"]
+    assert requests[0].url.path == "/api/projects/123/query/"
+    assert query["kind"] == "HogQLQuery"
+    assert query["query"].startswith("SELECT body, severity_text, timestamp, service_name FROM logs")
+    assert "service_name = {service_name}" in query["query"]
+    assert "OR 1=1" not in query["query"]
+    assert query["values"]["service_name"] == "api' OR 1=1 --"
+    assert logs[0].severity == "INFO"
+    assert logs[0].service_name == "unknown"
+    await shared.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_log_volume(mock_clickhouse_client):
     mock_clickhouse_client.execute.return_value = [(10000,)]
 
     posthog_client = PostHogLogsClient(clickhouse_host="localhost")
     posthog_client.clickhouse_client = mock_clickhouse_client
 
-    volume = posthog_client.get_log_volume(team_id=123, service_name="api", hours=24)
+    volume = await posthog_client.get_log_volume(team_id=123, service_name="api", hours=24)
 
     assert volume == 10000
 
 
-def test_get_log_volume_with_zero_results(mock_clickhouse_client):
+@pytest.mark.asyncio
+async def test_get_log_volume_with_zero_results(mock_clickhouse_client):
     mock_clickhouse_client.execute.return_value = []
 
     posthog_client = PostHogLogsClient(clickhouse_host="localhost")
     posthog_client.clickhouse_client = mock_clickhouse_client
 
-    volume = posthog_client.get_log_volume(team_id=123, service_name="api")
+    volume = await posthog_client.get_log_volume(team_id=123, service_name="api")
 
     assert volume == 0
 
 
-def test_get_active_services(mock_clickhouse_client):
+@pytest.mark.asyncio
+async def test_get_active_services(mock_clickhouse_client):
     mock_clickhouse_client.execute.return_value = [("api",), ("worker",), ("scheduler",)]
 
     posthog_client = PostHogLogsClient(clickhouse_host="localhost")
     posthog_client.clickhouse_client = mock_clickhouse_client
 
-    services = posthog_client.get_active_services(team_id=123, hours=24)
+    services = await posthog_client.get_active_services(team_id=123, hours=24)
 
     assert len(services) == 3
     assert "api" in services
     assert "worker" in services
 
 
-def test_get_active_services_filters_null_values(mock_clickhouse_client):
+@pytest.mark.asyncio
+async def test_get_active_services_filters_null_values(mock_clickhouse_client):
     mock_clickhouse_client.execute.return_value = [("api",), (None,), ("worker",), ("",)]
 
     posthog_client = PostHogLogsClient(clickhouse_host="localhost")
     posthog_client.clickhouse_client = mock_clickhouse_client
 
-    services = posthog_client.get_active_services(team_id=123)
+    services = await posthog_client.get_active_services(team_id=123)
 
     assert len(services) == 2
     assert "api" in services
@@ -120,21 +248,70 @@ def test_get_active_services_filters_null_values(mock_clickhouse_client):
 
 
 @pytest.mark.parametrize(
-    "team_id,hours,expected_in_query",
+    "team_id,hours",
     [
-        (123, 1, "team_id = 123"),
-        (456, 24, "INTERVAL 24 HOUR"),
-        (789, 48, "team_id = 789"),
+        (123, 1),
+        (456, 24),
+        (789, 48),
     ],
 )
-def test_query_construction(mock_clickhouse_client, team_id, hours, expected_in_query):
+@pytest.mark.asyncio
+async def test_query_construction(mock_clickhouse_client, team_id, hours):
     mock_clickhouse_client.execute.return_value = []
 
     posthog_client = PostHogLogsClient(clickhouse_host="localhost")
     posthog_client.clickhouse_client = mock_clickhouse_client
 
-    posthog_client.get_log_volume(team_id=team_id, service_name="test", hours=hours)
+    await posthog_client.get_log_volume(team_id=team_id, service_name="test", hours=hours)
+
+    executed_query, params = mock_clickhouse_client.execute.call_args[0]
+    assert "team_id = %(team_id)s" in executed_query
+    assert "INTERVAL %(hours)s HOUR" in executed_query
+    assert params == {"team_id": team_id, "service_name": "test", "hours": hours}
+
+
+@pytest.mark.asyncio
+async def test_service_name_is_bound_not_interpolated(mock_clickhouse_client):
+    mock_clickhouse_client.execute.return_value = [(0,)]
+
+    posthog_client = PostHogLogsClient(clickhouse_host="localhost")
+    posthog_client.clickhouse_client = mock_clickhouse_client
+
+    await posthog_client.get_log_volume(team_id=1, service_name="api' OR '1'='1")
+
+    executed_query, params = mock_clickhouse_client.execute.call_args[0]
+    assert "OR" not in executed_query
+    assert params["service_name"] == "api' OR '1'='1"
+
+
+@pytest.mark.asyncio
+async def test_volume_and_services_are_cached_across_clients(mock_clickhouse_client):
+    # Clients are created per request, so results must outlive the instance
+    first = PostHogLogsClient(clickhouse_host="localhost")
+    first.clickhouse_client = mock_clickhouse_client
+    second = PostHogLogsClient(clickhouse_host="localhost")
+    second.clickhouse_client = mock_clickhouse_client
+
+    mock_clickhouse_client.execute.return_value = [(10000,)]
+    assert await first.get_log_volume(team_id=123, service_name="api") == 10000
+    assert await second.get_log_volume(team_id=123, service_name="api") == 10000
+
+    mock_clickhouse_client.execute.return_value = [("api",)]
+    assert await first.get_active_services(team_id=123) == ["api"]
+    assert await second.get_active_services(team_id=123) == ["api"]
+
+    assert mock_clickhouse_client.execute.call_count == 2
 
-    executed_query = mock_clickhouse_client.execute.call_args[0][0]
-    assert expected_in_query in executed_query
 
+@pytest.mark.asyncio
+async def test_lookup_cache_is_keyed_by_clickhouse_server(mock_clickhouse_client):
+    local = PostHogLogsClient(clickhouse_host="localhost")
+    local.clickhouse_client = mock_clickhouse_client
+    remote = PostHogLogsClient(clickhouse_host="clickhouse.internal", clickhouse_port=9440)
+    remote.clickhouse_client = mock_clickhouse_client
+
+    mock_clickhouse_client.execute.return_value = [(10000,)]
+    assert await local.get_log_volume(team_id=123, service_name="api") == 10000
+
+    mock_clickhouse_client.execute.return_value = [(42,)]
+    assert await remote.get_log_volume(team_id=123, service_name="api") == 42
@@ -3,6 +3,9 @@ Tests for Real-Time Streaming and Advanced Visualization
 """
 
 import asyncio
+import zlib
+import numpy as np
+import orjson
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -10,13 +13,13 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from src.realtime_streaming import (
     StreamConfig, StreamMetrics, StreamAlert, StreamEvent,
     LogBuffer, RealTimeLogProcessor, WebSocketStreamManager,
-    RealTimeStreamService
+    RealTimeStreamService, KafkaStreamConsumer
 )
 from src.visualization import (
     VisualizationConfig, ClusterVisualization, CorrelationTimeline,
     InsightDashboard, MetricsDashboard, DashboardManager,
     ClusterVisualizer, CorrelationTimelineVisualizer, InsightDashboardGenerator,
-    MetricsDashboardGenerator
+    MetricsDashboardGenerator, encode_frame
 )
 from src.intelligent_analysis import LogEntry, LogCluster, CorrelationPattern, LogInsight
 
@@ -68,6 +71,38 @@ class TestLogBuffer:
         # Buffer should only contain last 3 logs
         assert buffer.size() == 3
     
+    @pytest.mark.asyncio
+    async def test_add_logs_batch(self):
+        """Test adding a batch of logs keeps the newest within the size limit"""
+        buffer = LogBuffer(max_size=3)
+        logs = [
+            LogEntry(
+                id=str(i),
+                timestamp=datetime.utcnow(),
+                level="INFO",
+                message=f"Message {i}",
+                service_name="test-service"
+            )
+            for i in range(5)
+        ]
+        
+        await buffer.add_logs(logs)
+        
+        assert [log.id for log in await buffer.get_logs()] == ["2", "3", "4"]
+    
+    @pytest.mark.asyncio
+    async def test_get_logs_drains_oldest_first(self):
+        """Test a partial drain pops the oldest logs and leaves the rest in order"""
+        buffer = LogBuffer(max_size=10)
+        await buffer.add_logs([
+            LogEntry(id=str(i), timestamp=datetime.utcnow(), level="INFO", message=f"Message {i}")
+            for i in range(5)
+        ])
+        
+        assert [log.id for log in await buffer.get_logs(2)] == ["0", "1"]
+        assert [log.id for log in await buffer.get_logs(10)] == ["2", "3", "4"]
+        assert buffer.size() == 0
+    
     @pytest.mark.asyncio
     async def test_wait_for_logs(self, sample_log):
         """Test waiting for logs"""
@@ -83,6 +118,28 @@ class TestLogBuffer:
         # Wait should complete
         result = await wait_task
         assert result is True
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_logs_wakes_on_batch_threshold(self, sample_log):
+        """Test waiters sleep through adds below the threshold and wake on a full batch"""
+        buffer = LogBuffer(max_size=10, batch_threshold=3)
+        
+        wait_task = asyncio.create_task(buffer.wait_for_logs(timeout=1.0))
+        await buffer.add_logs([sample_log, sample_log])
+        await asyncio.sleep(0.05)
+        assert not wait_task.done()
+        
+        await buffer.add_log(sample_log)
+        assert await asyncio.wait_for(wait_task, timeout=0.1) is True
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_logs_returns_partial_batch_on_timeout(self, sample_log):
+        """Test a partial batch is still reported once the timeout passes"""
+        buffer = LogBuffer(max_size=10, batch_threshold=3)
+        await buffer.add_log(sample_log)
+        
+        assert await buffer.wait_for_logs(timeout=0.01) is True
+        assert await LogBuffer(batch_threshold=3).wait_for_logs(timeout=0.01) is False
 
 
 class TestRealTimeLogProcessor:
@@ -128,6 +185,14 @@ class TestRealTimeLogProcessor:
         
         await processor.stop()
     
+    @pytest.mark.asyncio
+    async def test_add_logs(self, processor, sample_log):
+        """Test adding a batch of logs to processor"""
+        await processor.add_logs([sample_log, sample_log, sample_log])
+        
+        assert processor.metrics.logs_received == 3
+        assert processor.buffer.size() == 3
+    
     @pytest.mark.asyncio
     async def test_processing_loop(self, processor, sample_log):
         """Test the main processing loop"""
@@ -145,6 +210,39 @@ class TestRealTimeLogProcessor:
         
         await processor.stop()
     
+    @pytest.mark.asyncio
+    async def test_process_batch_analyzes_kept_logs_once(self, processor, sample_log):
+        """Test a batch is filtered per log but analyzed in a single call"""
+        dropped = LogEntry(id="2", timestamp=datetime.utcnow(), level="INFO", message="noise", service_name="test-service")
+        processor.filter_engine.adaptive_filter = AsyncMock(
+            side_effect=lambda log, context: MagicMock(sampling_rate=1.0 if log.id == "1" else 0.0)
+        )
+        processor.analyzer.analyze_logs = AsyncMock(return_value={"insights": []})
+        await processor.buffer.add_logs([sample_log, dropped])
+        
+        await processor._process_batch()
+        
+        processor.analyzer.analyze_logs.assert_awaited_once()
+        assert processor.analyzer.analyze_logs.await_args.kwargs["logs"] == [sample_log]
+        assert processor.metrics.logs_processed == 2
+        assert processor.metrics.logs_filtered == 1
+    
+    @pytest.mark.asyncio
+    async def test_emit_event_survives_failing_handler(self, processor, sample_log):
+        """Test every handler is notified even when one raises, and single logs emit nothing"""
+        failing = AsyncMock(side_effect=RuntimeError("boom"))
+        healthy = AsyncMock()
+        processor.add_event_handler(failing)
+        processor.add_event_handler(healthy)
+        
+        await processor.add_log(sample_log)
+        healthy.assert_not_awaited()
+        
+        await processor._emit_event("batch_processed", {"log_count": 1})
+        
+        failing.assert_awaited_once()
+        assert healthy.await_args.args[0].event_type == "batch_processed"
+    
     def test_get_metrics(self, processor):
         """Test getting metrics"""
         metrics = processor.get_metrics()
@@ -159,6 +257,33 @@ class TestRealTimeLogProcessor:
         
         assert isinstance(alerts, list)
         assert len(alerts) == 0
+    
+    @pytest.mark.asyncio
+    async def test_alert_index_tracks_retained_alerts(self, processor):
+        """Test alerts are indexed by id and evicted with the alert list"""
+        alerts = [
+            StreamAlert(type="insight", title=f"Alert {i}", message="msg", severity="high")
+            for i in range(101)
+        ]
+        for alert in alerts:
+            await processor._add_alert(alert)
+        
+        assert processor.get_alert(alerts[0].id) is None
+        assert processor.get_alert(alerts[-1].id) is alerts[-1]
+        assert len(processor.alerts_by_id) == len(processor.alerts) == 100
+    
+    @pytest.mark.asyncio
+    async def test_get_alerts_pagination(self, processor):
+        """Test alert pages are counted back from the newest alert"""
+        for i in range(5):
+            await processor._add_alert(
+                StreamAlert(type="insight", title=f"Alert {i}", message="msg", severity="high")
+            )
+        
+        assert [a.title for a in processor.get_alerts(limit=2)] == ["Alert 3", "Alert 4"]
+        assert [a.title for a in processor.get_alerts(limit=2, offset=2)] == ["Alert 1", "Alert 2"]
+        assert [a.title for a in processor.get_alerts(limit=2, offset=4)] == ["Alert 0"]
+        assert processor.get_alerts(limit=2, offset=5) == []
 
 
 class TestWebSocketStreamManager:
@@ -190,6 +315,12 @@ class TestWebSocketStreamManager:
         assert mock_websocket in ws_manager.active_connections
         assert ws_manager.processor.metrics.active_connections == 1
         mock_websocket.accept.assert_called_once()
+        
+        welcome = orjson.loads(mock_websocket.send_bytes.call_args[0][0])
+        assert welcome["type"] == "welcome"
+        assert "log_streaming" in welcome["capabilities"]
+        assert welcome["timestamp"].endswith("+00:00")
+        assert datetime.fromisoformat(welcome["timestamp"])
     
     @pytest.mark.asyncio
     async def test_disconnect(self, ws_manager, mock_websocket):
@@ -211,17 +342,90 @@ class TestWebSocketStreamManager:
         )
         
         await ws_manager.broadcast_event(event)
+        await asyncio.sleep(0.01)  # let the connection's writer send the frame
         
-        mock_websocket.send_text.assert_called_once()
+        message = orjson.loads(mock_websocket.send_bytes.call_args[0][0])
+        assert message["type"] == "stream_event"
+        assert message["event"]["data"] == {"test": "data"}
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_event_encodes_numpy_and_naive_timestamps(self, ws_manager, mock_websocket):
+        """Test NumPy scalars stay numeric and naive timestamps are marked UTC"""
+        await ws_manager.connect(mock_websocket)
+        
+        event = StreamEvent(
+            event_type="test_event",
+            timestamp=datetime(2024, 1, 1, 12, 0, 0),
+            data={"confidence": np.float64(0.5)}
+        )
+        await ws_manager.broadcast_event(event)
+        await asyncio.sleep(0.01)
+        
+        message = orjson.loads(mock_websocket.send_bytes.call_args[0][0])
+        assert message["event"]["data"]["confidence"] == 0.5
+        assert message["event"]["timestamp"] == "2024-01-01T12:00:00+00:00"
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_event_drops_stalled_clients(self, ws_manager):
+        """Test a client that never finishes a send is timed out and removed"""
+        healthy, stalled = AsyncMock(), AsyncMock()
+        await ws_manager.connect(healthy)
+        await ws_manager.connect(stalled)
+        
+        async def never_finishes(frame):
+            await asyncio.sleep(10)
+        
+        stalled.send_bytes.side_effect = never_finishes
+        ws_manager.SEND_TIMEOUT_SECONDS = 0.01
+        
+        await ws_manager.broadcast_event(StreamEvent(event_type="test_event"))
+        await asyncio.sleep(0.05)
+        
+        assert ws_manager.active_connections == [healthy]
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_event_drops_oldest_frames_for_slow_clients(self, ws_manager):
+        """Test a backlogged client keeps only the newest MAX_PENDING_FRAMES frames"""
+        ws_manager.MAX_PENDING_FRAMES = 2
+        slow = AsyncMock()
+        await ws_manager.connect(slow)
+        
+        async def never_finishes(frame):
+            await asyncio.sleep(10)
+        
+        slow.send_bytes.side_effect = never_finishes
+        for i in range(5):
+            await ws_manager.broadcast_event(StreamEvent(event_type=f"event_{i}"))
+            await asyncio.sleep(0)
+        
+        outbox = ws_manager._outboxes[slow]
+        queued = [orjson.loads(outbox.get_nowait())["event"]["event_type"] for _ in range(outbox.qsize())]
+        assert queued == ["event_3", "event_4"]
+        await ws_manager.disconnect(slow)
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_event_drops_failed_clients(self, ws_manager):
+        """Test one encoded frame reaches every client and failed clients are removed"""
+        healthy, broken = AsyncMock(), AsyncMock()
+        await ws_manager.connect(healthy)
+        await ws_manager.connect(broken)
+        broken.send_bytes.side_effect = RuntimeError("closed")
+        
+        await ws_manager.broadcast_event(StreamEvent(event_type="test_event"))
+        await asyncio.sleep(0.01)
+        
+        assert healthy.send_bytes.await_args.args[0] is broken.send_bytes.await_args.args[0]
+        assert ws_manager.active_connections == [healthy]
+        assert ws_manager.processor.metrics.active_connections == 1
     
     @pytest.mark.asyncio
     async def test_send_metrics(self, ws_manager, mock_websocket):
         """Test sending metrics"""
         await ws_manager.send_metrics(mock_websocket)
         
-        mock_websocket.send_text.assert_called_once()
-        call_args = mock_websocket.send_text.call_args[0][0]
-        message = json.loads(call_args)
+        mock_websocket.send_bytes.assert_called_once()
+        call_args = mock_websocket.send_bytes.call_args[0][0]
+        message = orjson.loads(call_args)
         assert message["type"] == "metrics"
     
     @pytest.mark.asyncio
@@ -229,12 +433,57 @@ class TestWebSocketStreamManager:
         """Test sending alerts"""
         await ws_manager.send_alerts(mock_websocket, limit=5)
         
-        mock_websocket.send_text.assert_called_once()
-        call_args = mock_websocket.send_text.call_args[0][0]
-        message = json.loads(call_args)
+        mock_websocket.send_bytes.assert_called_once()
+        call_args = mock_websocket.send_bytes.call_args[0][0]
+        message = orjson.loads(call_args)
         assert message["type"] == "alerts"
 
 
+class TestKafkaStreamConsumer:
+    """Test Kafka ingestion batching"""
+    
+    @pytest.mark.asyncio
+    async def test_consumer_is_idle_without_config(self):
+        """Test no consumer task is started when Kafka is not configured"""
+        consumer = KafkaStreamConsumer(RealTimeLogProcessor())
+        
+        await consumer.start()
+        
+        assert consumer._consumer_task is None
+    
+    @pytest.mark.asyncio
+    async def test_polled_records_are_buffered_in_one_call(self):
+        """Test one getmany() poll is decoded and handed to the processor as a single batch"""
+        processor = RealTimeLogProcessor(StreamConfig(batch_size=50))
+        processor.add_logs = AsyncMock()
+        records = {
+            "partition-0": [
+                MagicMock(value=orjson.dumps({"id": str(i), "level": "INFO", "message": "m"})) for i in range(3)
+            ],
+            "partition-1": [MagicMock(value=b"not json")],
+        }
+        polls = [records]
+        
+        async def getmany(timeout_ms, max_records):
+            if polls:
+                return polls.pop()
+            await asyncio.sleep(timeout_ms / 1000)
+            return {}
+        
+        kafka = MagicMock(start=AsyncMock(), stop=AsyncMock())
+        kafka.getmany = AsyncMock(side_effect=getmany)
+        consumer = KafkaStreamConsumer(processor, consumer=kafka)
+        
+        await consumer.start()
+        await asyncio.sleep(0.01)
+        await consumer.stop()
+        
+        assert kafka.getmany.await_args_list[0].kwargs == {"timeout_ms": 100, "max_records": 50}
+        assert [log.id for log in processor.add_logs.await_args_list[0].args[0]] == ["0", "1", "2"]
+        assert processor.metrics.error_count == 1
+        kafka.stop.assert_awaited_once()
+
+
 class TestRealTimeStreamService:
     """Test real-time stream service functionality"""
     
@@ -492,6 +741,21 @@ class TestDashboardManager:
         
         assert mock_websocket in manager.active_connections
         mock_websocket.accept.assert_called_once()
+        
+        welcome = orjson.loads(mock_websocket.send_bytes.call_args[0][0])
+        assert welcome["type"] == "dashboard_welcome"
+        assert welcome["config"]["theme"] == "dark"
+    
+    def test_encode_frame_handles_models_and_datetimes(self):
+        """Test dashboard frames serialize pydantic models and naive datetimes"""
+        frame = encode_frame({
+            "data": VisualizationConfig(),
+            "timestamp": datetime(2025, 1, 1, 12, 0, 0)
+        })
+        
+        message = orjson.loads(frame)
+        assert message["data"]["refresh_interval"] == 1.0
+        assert message["timestamp"] == "2025-01-01T12:00:00+00:00"
     
     @pytest.mark.asyncio
     async def test_disconnect(self, manager, mock_websocket):
@@ -500,6 +764,68 @@ class TestDashboardManager:
         await manager.disconnect(mock_websocket)
         
         assert mock_websocket not in manager.active_connections
+
+    @pytest.mark.asyncio
+    async def test_enqueue_coalesces_burst_into_one_frame(self, manager, mock_websocket):
+        """Test queued replies are drained and sent as a single frame"""
+        await manager.connect(mock_websocket)
+        mock_websocket.send_bytes.reset_mock()
+    
+        for i in range(3):
+            assert manager.enqueue(mock_websocket, {"type": "pong", "seq": i})
+        await asyncio.sleep(0)
+    
+        mock_websocket.send_bytes.assert_called_once()
+        frame = orjson.loads(mock_websocket.send_bytes.call_args[0][0])
+        assert frame["type"] == "batch"
+        assert [m["seq"] for m in frame["messages"]] == [0, 1, 2]
+    
+        await manager.disconnect(mock_websocket)
+        assert not manager.enqueue(mock_websocket, {"type": "pong"})
+
+    @pytest.mark.asyncio
+    async def test_enqueue_wraps_single_reply_in_batch_frame(self, manager, mock_websocket):
+        """Test a lone reply uses the same batch envelope as a burst"""
+        await manager.connect(mock_websocket)
+        mock_websocket.send_bytes.reset_mock()
+    
+        assert manager.enqueue(mock_websocket, {"type": "pong"})
+        await asyncio.sleep(0)
+    
+        frame = orjson.loads(mock_websocket.send_bytes.call_args[0][0])
+        assert frame == {"type": "batch", "messages": [{"type": "pong"}]}
+    
+        await manager.disconnect(mock_websocket)
+
+    @pytest.mark.asyncio
+    async def test_broadcast_disconnects_failed_clients(self, manager):
+        """Test broadcast reaches every client and drops the ones that fail"""
+        healthy, broken = AsyncMock(), AsyncMock()
+        await manager.connect(healthy)
+        await manager.connect(broken)
+        healthy.send_bytes.reset_mock()
+        broken.send_bytes.reset_mock()
+        broken.send_bytes.side_effect = RuntimeError("closed")
+    
+        await manager._broadcast({"type": "dashboard_update"})
+    
+        assert orjson.loads(healthy.send_bytes.call_args[0][0])["type"] == "dashboard_update"
+        broken.send_bytes.assert_called_once()
+        assert manager.active_connections == [healthy]
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_compresses_frames_when_enabled(self, mock_websocket):
+        """Test broadcast frames are zlib-compressed once compress_frames is set"""
+        manager = DashboardManager(VisualizationConfig(compress_frames=True))
+        await manager.connect(mock_websocket)
+        
+        welcome = orjson.loads(mock_websocket.send_bytes.call_args[0][0])
+        assert welcome["config"]["compress_frames"] is True
+        
+        await manager._broadcast({"type": "dashboard_update"})
+        
+        frame = mock_websocket.send_bytes.call_args[0][0]
+        assert orjson.loads(zlib.decompress(frame))["type"] == "dashboard_update"
     
     @pytest.mark.asyncio
     async def test_update_loop(self, manager):
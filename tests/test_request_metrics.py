@@ -0,0 +1,37 @@
+import httpx
+import orjson
+import pytest
+
+from src.integrations.request_metrics import RequestMetrics
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_queued_timings_in_one_batch():
+    payloads = []
+
+    def handler(request):
+        payloads.append(orjson.loads(request.content))
+        return httpx.Response(200)
+
+    metrics = RequestMetrics("https://posthog.example/", "key", flush_interval=60)
+    metrics.start()
+    await metrics._client.aclose()
+    metrics._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    metrics.record("GET", "/health", 200, 1_500_000)
+    metrics.record("POST", "/api/v1/pipeline/generate-policy", 500, 2_000_000)
+    await metrics.stop()
+
+    assert len(payloads) == 1
+    assert payloads[0]["api_key"] == "key"
+    assert [e["properties"]["route"] for e in payloads[0]["batch"]] == ["/health", "/api/v1/pipeline/generate-policy"]
+    assert payloads[0]["batch"][0]["properties"]["duration_ms"] == 1.5
+
+
+def test_record_drops_timings_when_queue_is_full():
+    metrics = RequestMetrics("https://posthog.example", "key", queue_size=1)
+
+    metrics.record("GET", "/health", 200, 1)
+    metrics.record("GET", "/health", 200, 1)
+
+    assert metrics.dropped == 1
@@ -1,6 +1,11 @@
 import pytest
 
-from src.engine.signature import compute_signature, compute_signature_with_context, extract_error_type
+from src.engine.signature import (
+    compute_signature,
+    compute_signature_with_context,
+    compute_signatures,
+    extract_error_type,
+)
 
 
 @pytest.mark.parametrize(
@@ -58,6 +63,12 @@ def test_empty_message_returns_consistent_hash():
     assert len(sig1) == 32
 
 
+def test_compute_signatures_matches_single_message_signatures():
+    messages = ["User 1 logged in", "Payment failed", "User 1 logged in", "User 2 logged in"]
+
+    assert compute_signatures(messages) == [compute_signature(m) for m in messages]
+
+
 def test_signature_is_md5_hash():
     sig = compute_signature("Test message")
     assert len(sig) == 32